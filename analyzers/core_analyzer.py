@@ -6,10 +6,11 @@
 """
 
 import logging
+import os
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from time import time
 
 from .analyzer_config import get_config
@@ -92,12 +93,30 @@ class GenericComplexityAnalyzer:
             self.parallel_enabled = False
             logger.info("并行处理已禁用，将使用串行处理")
 
+        # 文件复杂度分析的进程池，整次扫描的各模块共用（工作进程在首次提交任务时才启动）
+        self.process_pool = None
+        process_workers = min(self.config.parallel_processing['max_workers'], os.cpu_count() or 1)
+        if self.parallel_enabled and process_workers > 1:
+            try:
+                self.process_pool = ProcessPoolExecutor(max_workers=process_workers)
+            except Exception as e:
+                logger.warning(f"创建进程池失败，文件将串行分析: {e}")
+
     def __del__(self):
         """析构函数，确保线程池正确关闭"""
         self.cleanup()
 
     def cleanup(self):
-        """清理资源，关闭线程池"""
+        """清理资源，关闭线程池与进程池"""
+        if getattr(self, 'process_pool', None) is not None:
+            try:
+                self.process_pool.shutdown(wait=True)
+                logger.info("进程池已关闭")
+            except Exception as e:
+                logger.warning(f"关闭进程池时出错: {e}")
+            finally:
+                self.process_pool = None
+
         if hasattr(self, 'executor') and self.executor is not None:
             try:
                 self.executor.shutdown(wait=True)
@@ -213,18 +232,20 @@ class GenericComplexityAnalyzer:
 
         try:
             module_count = 0
-            for module_path in self.project_path.iterdir():
-                if module_path.is_dir():
-                    module_name = module_path.name
-                    print(f"分析模块: {module_name}")
-
-                    try:
-                        self.analyze_module(module_path, module_name)
-                        module_count += 1
-                    except Exception as e:
-                        logger.error(f"分析模块失败 {module_name}: {e}")
-                        self.stats['errors_encountered'] += 1
-                        continue
+            module_paths = [path for path in self.project_path.iterdir() if path.is_dir()]
+            # 模块类型检测以文件系统访问为主，先并行检测全部模块，再逐个分析
+            module_types = self._detect_module_types(module_paths)
+            for module_path in module_paths:
+                module_name = module_path.name
+                print(f"分析模块: {module_name}")
+
+                try:
+                    self.analyze_module(module_path, module_name, module_types.get(module_path))
+                    module_count += 1
+                except Exception as e:
+                    logger.error(f"分析模块失败 {module_name}: {e}")
+                    self.stats['errors_encountered'] += 1
+                    continue
 
             # 生成语言分析数据
             self._generate_language_analysis()
@@ -285,14 +306,31 @@ class GenericComplexityAnalyzer:
             logger.error(f"生成语言分析数据失败: {e}")
             self.results['language_analysis'] = {}
 
-    def analyze_module(self, module_path: Path, module_name: str):
-        """分析单个模块"""
+    def _detect_module_types(self, module_paths: List[Path]) -> Dict[Path, str]:
+        """
+        并行检测各模块的类型，返回 模块路径 -> 项目类型
+
+        并行处理禁用或批量检测失败时返回空字典，由分析各模块时逐个检测（检测失败只影响对应模块）
+        """
+        if not self.parallel_enabled:
+            return {}
+        try:
+            module_types = self.project_detector.detect_many(
+                module_paths, self.config.parallel_processing['max_workers'])
+        except Exception as e:
+            logger.warning(f"批量检测模块类型失败，改为逐个模块检测: {e}")
+            return {}
+        return dict(zip(module_paths, module_types))
+
+    def analyze_module(self, module_path: Path, module_name: str, module_type: Optional[str] = None):
+        """分析单个模块（module_type 为已检测的模块类型，未提供时在此检测）"""
         try:
             # 检测模块类型
-            module_type = self.project_detector.detect_module_type(module_path)
+            if module_type is None:
+                module_type = self.project_detector.detect_module_type(module_path)
 
             # 分析模块（包含复杂度分析）
-            module_analysis = analyze_module(module_path, self.ignore_patterns)
+            module_analysis = analyze_module(module_path, self.ignore_patterns, self.process_pool)
 
             # 合并结果
             module_result = {
@@ -331,10 +369,7 @@ class GenericComplexityAnalyzer:
 
     def _analyze_module_complexity_parallel(self, module_path: Path) -> Dict[str, Any]:
         """并行分析模块复杂度"""
-        if self.parallel_enabled and self.executor:
-            return analyze_module_complexity(module_path, self.ignore_patterns)
-        else:
-            return analyze_module_complexity(module_path, self.ignore_patterns)
+        return analyze_module_complexity(module_path, self.ignore_patterns, process_pool=self.process_pool)
 
     def _analyze_module_complexity_serial(self, module_path: Path) -> Dict[str, Any]:
         """串行分析模块复杂度"""
@@ -389,14 +424,14 @@ class GenericComplexityAnalyzer:
             logger.error(f"生成建议失败: {e}")
             self.results['recommendations'] = ["生成建议时发生错误"]
 
-    def generate_report(self, output_file: str = None):
-        """生成分析报告"""
+    def generate_report(self, output_file: str = None, pretty: bool = False):
+        """生成分析报告（pretty 为 True 时输出缩进格式的JSON）"""
         try:
             # 创建报告生成器
             report_generator = ReportGenerator(self.results, self.stats, self.config)
 
             # 生成报告
-            output_file = report_generator.generate_report(output_file)
+            output_file = report_generator.generate_report(output_file, pretty)
 
             # 打印摘要
             report_generator.print_summary()
@@ -66,6 +66,8 @@ class LanguageAnalyzerManager:
         self.analyzers_dir = Path(analyzers_dir)
         self.analyzers: Dict[str, LanguageAnalyzer] = {}
         self.extension_map: Dict[str, LanguageAnalyzer] = {}
+        # 分析器注册表版本号：注册、移除、重新加载分析器时递增，调用方据此判断按注册表缓存的数据是否失效
+        self.registry_version = 0
         self._load_analyzers()
 
     def _load_analyzers(self):
@@ -137,6 +139,7 @@ class LanguageAnalyzerManager:
             logger.warning(f"分析器已存在，将被覆盖: {analyzer.language_name}")
 
         self.analyzers[analyzer.language_name] = analyzer
+        self.registry_version += 1
 
         # 注册文件扩展名映射
         for ext in analyzer.file_extensions:
@@ -221,6 +224,7 @@ class LanguageAnalyzerManager:
         """重新加载所有分析器"""
         self.analyzers.clear()
         self.extension_map.clear()
+        self.registry_version += 1
         self._load_analyzers()
         logger.info("分析器已重新加载")
 
@@ -239,6 +243,7 @@ class LanguageAnalyzerManager:
                     del self.extension_map[ext]
 
             del self.analyzers[language_name]
+            self.registry_version += 1
             logger.info(f"已移除分析器: {language_name}")
         else:
             logger.warning(f"分析器不存在: {language_name}")
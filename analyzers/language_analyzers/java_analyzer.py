@@ -6,6 +6,7 @@ Java代码复杂度分析器
 """
 
 import re
+import stat
 from pathlib import Path
 from typing import Dict, Any, List, Tuple
 import logging
@@ -17,6 +18,8 @@ logger = logging.getLogger(__name__)
 class JavaAnalyzer(LanguageAnalyzer):
     """Java语言分析器"""
 
+    _EXTENSIONS = frozenset({'.java'})
+
     @property
     def language_name(self) -> str:
         return "java"
@@ -31,19 +34,16 @@ class JavaAnalyzer(LanguageAnalyzer):
 
     def can_analyze(self, file_path: Path) -> bool:
         """检查是否可以分析此文件"""
-        if not file_path.exists() or not file_path.is_file():
+        # 先检查扩展名，再用一次stat同时判断存在性、文件类型与大小
+        if file_path.suffix.lower() not in self._EXTENSIONS:
             return False
 
-        # 检查文件大小
         try:
-            file_size = file_path.stat().st_size
-            if file_size > 10 * 1024 * 1024:  # 10MB
-                return False
+            file_stat = file_path.stat()
         except OSError:
             return False
 
-        # 检查文件扩展名
-        return file_path.suffix.lower() == '.java'
+        return stat.S_ISREG(file_stat.st_mode) and file_stat.st_size <= 10 * 1024 * 1024  # 10MB
 
     def analyze(self, file_path: Path) -> Dict[str, Any]:
         """分析Java文件复杂度"""
@@ -6,17 +6,45 @@ JavaScript代码复杂度分析器
 """
 
 import re
+import stat
+from bisect import bisect_left, bisect_right
 from pathlib import Path
 from typing import Dict, Any, List, Tuple
 import logging
 from ..language_analyzer_manager import LanguageAnalyzer
+from ..source_utils import (
+    read_source_bytes, decode_source, split_lines, newline_offsets, line_number_at,
+    iter_first_match_lines, classify_lines, mark_block_comment_lines,
+    LINE_CODE, LINE_BLANK, LINE_COMMENT
+)
 
 logger = logging.getLogger(__name__)
 
+# 整文件扫描用的预编译模式，空白只匹配行内字符（[^\S\n]），保证匹配不跨行；
+# 关键字字面量在前、单词边界用后置断言校验，使正则引擎可以按字面量前缀快速定位
+_IMPORT_PATTERN = re.compile(r'^[^\S\n]*import ', re.MULTILINE)
+_EXPORT_PATTERN = re.compile(r'^[^\S\n]*export |export default', re.MULTILINE)
+_VARIABLE_PATTERN = re.compile(r'(?:const(?<!\wconst)|let(?<!\wlet)|var(?<!\wvar))[^\S\n]+\w+')
+_CLASS_PATTERN = re.compile(r'class(?<!\wclass)[^\S\n]+(\w+)')
+_FUNCTION_PATTERN = re.compile(r'(?:function(?<!\wfunction)|const(?<!\wconst)|let(?<!\wlet))[^\S\n]+(\w+)')
+# 方法定义锚定在行首（允许缩进及 static/async/get/set 修饰、生成器*与私有#前缀），
+# 参数列表不含括号，匹配失败时不会在行内逐字符回溯重试
+_METHOD_PATTERN = re.compile(
+    r'^[^\S\n]*(?:(?:static|async|get|set)[^\S\n]+)*[*#]?(\w+)[^\S\n]*\([^()\n]*\)[^\S\n]*[:{=]', re.MULTILINE
+)
+# 形如 name(...) { 的控制语句关键字，不计为方法
+_CONTROL_KEYWORDS = frozenset({'if', 'for', 'while', 'switch', 'catch', 'with'})
+_BRACE_PATTERN = re.compile(r'[{}]')
+
+# 参与复杂度计算与异味检测的统计项，以及异味检测的最小阈值（嵌套级别 > 5）
+_COMPLEXITY_KEYS = ('classes', 'methods', 'functions', 'max_nested_level', 'imports', 'variables')
+_MIN_SMELL_THRESHOLD = 5
 
 class JavaScriptAnalyzer(LanguageAnalyzer):
     """JavaScript语言分析器"""
 
+    _EXTENSIONS = frozenset({'.js', '.jsx'})
+
     @property
     def language_name(self) -> str:
         return "javascript"
@@ -31,19 +59,16 @@ class JavaScriptAnalyzer(LanguageAnalyzer):
 
     def can_analyze(self, file_path: Path) -> bool:
         """检查是否可以分析此文件"""
-        if not file_path.exists() or not file_path.is_file():
+        # 先检查扩展名，再用一次stat同时判断存在性、文件类型与大小
+        if file_path.suffix.lower() not in self._EXTENSIONS:
             return False
 
-        # 检查文件大小
         try:
-            file_size = file_path.stat().st_size
-            if file_size > 10 * 1024 * 1024:  # 10MB
-                return False
+            file_stat = file_path.stat()
         except OSError:
             return False
 
-        # 检查文件扩展名
-        return file_path.suffix.lower() in ['.js', '.jsx']
+        return stat.S_ISREG(file_stat.st_mode) and file_stat.st_size <= 10 * 1024 * 1024  # 10MB
 
     def analyze(self, file_path: Path) -> Dict[str, Any]:
         """分析JavaScript文件复杂度"""
@@ -75,102 +100,137 @@ def analyze_javascript_complexity_detailed(file_path: Path) -> Dict[str, Any]:
     }
 
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
+        raw = read_source_bytes(file_path)
+        source = decode_source(raw)
+        lines = split_lines(source)
+        offsets = newline_offsets(source)
 
         result['lines'] = len(lines)
-        in_multiline_comment = False
-        current_nested_level = 0
-        current_class = None
-        current_function = None
 
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-
-            # 跳过空行
-            if not line:
-                result['blank_lines'] += 1
-                continue
+        # 空文件：各项统计均为0，直接给出基础复杂度
+        if not lines:
+            result['complexity'] = _calculate_javascript_complexity(result)
+            result['cyclomatic_complexity'] = result['complexity']
+            return result
 
-            # 处理多行注释
-            if '/*' in line and '*/' not in line:
-                in_multiline_comment = True
-                result['comment_lines'] += 1
-                continue
-            elif '*/' in line:
-                in_multiline_comment = False
-                result['comment_lines'] += 1
-                continue
-            elif in_multiline_comment:
-                result['comment_lines'] += 1
-                continue
+        # 行分类：空行、单行注释、块注释
+        line_kinds = classify_lines(lines, ('//', '/*', '*'), raw)
+        if '*/' in source or '/*' in source:
+            mark_block_comment_lines(line_kinds, source)
 
-            # 单行注释
-            if line.startswith('//') or line.startswith('/*') or line.startswith('*'):
-                result['comment_lines'] += 1
+        # 各项计数使用局部变量累加，扫描结束后统一写入结果
+        # 统计嵌套级别：只处理含括号的代码行，记录每个括号行处理后的级别
+        current_nested_level = 0
+        max_nested_level = 0
+        brace_lines = []
+        brace_levels = []
+        for line_num, _ in iter_first_match_lines(_BRACE_PATTERN, source, offsets):
+            if line_kinds[line_num] != LINE_CODE:
                 continue
+            line = lines[line_num - 1]
 
-            # 统计代码行
-            result['code_lines'] += 1
-
-            # 检测imports
-            if line.startswith('import '):
-                result['imports'] += 1
-
-            # 检测exports
-            if line.startswith('export ') or 'export default' in line:
-                result['exports'] += 1
-
-            # 检测变量声明
-            if re.search(r'\b(const|let|var)\s+\w+', line):
-                result['variables'] += 1
-
-            # 统计类
-            class_match = re.search(r'\b(export\s+)?class\s+(\w+)', line)
-            if class_match:
-                result['classes'] += 1
-                class_name = class_match.group(2)
-                modifiers = []
-                if 'export' in line: modifiers.append('export')
-
-                current_class = {
-                    'name': class_name,
-                    'modifiers': modifiers,
-                    'line': line_num,
-                    'nested_level': current_nested_level
-                }
-                result['class_details'].append(current_class)
-
-            # 统计函数
-            function_match = re.search(r'\b(export\s+)?(function|const|let)\s+(\w+)', line)
-            if function_match:
-                result['functions'] += 1
-                function_name = function_match.group(3)
-                result['function_details'].append({
-                    'name': function_name,
-                    'line': line_num,
-                    'type': 'function',
-                    'class': current_class['name'] if current_class else None
-                })
-
-            # 统计方法（类内的函数）
-            method_match = re.search(r'\b(\w+)\s*\([^)]*\)\s*[:{=]', line)
-            if current_class and method_match and not line.startswith('if') and not line.startswith('for'):
-                result['methods'] += 1
-                method_name = method_match.group(1)
-                result['method_details'].append({
-                    'name': method_name,
-                    'line': line_num,
-                    'type': 'method',
-                    'class': current_class['name']
-                })
-
-            # 统计嵌套级别
             if '{' in line:
                 current_nested_level += 1
-                result['max_nested_level'] = max(result['max_nested_level'], current_nested_level)
+                if current_nested_level > max_nested_level:
+                    max_nested_level = current_nested_level
             if '}' in line:
                 current_nested_level = max(0, current_nested_level - 1)
+            brace_lines.append(line_num)
+            brace_levels.append(current_nested_level)
+
+        # 整文件一次性正则扫描，通过换行偏移表二分定位行号；
+        # 源码中不含对应关键字时跳过整段扫描（小文件常见）
+        # 检测imports
+        imports = 0
+        for match in (_IMPORT_PATTERN.finditer(source) if 'import' in source else ()):
+            if line_kinds[line_number_at(offsets, match.start())] == LINE_CODE:
+                imports += 1
+
+        # 检测exports
+        exports = 0
+        for line_num, _ in (iter_first_match_lines(_EXPORT_PATTERN, source, offsets) if 'export' in source else ()):
+            if line_kinds[line_num] == LINE_CODE:
+                exports += 1
+
+        # 检测变量声明
+        variables = 0
+        for line_num, _ in iter_first_match_lines(_VARIABLE_PATTERN, source, offsets):
+            if line_kinds[line_num] == LINE_CODE:
+                variables += 1
+
+        # 统计类、函数与方法：扫描时按字段收集到并列列表，扫描结束后再一次性生成明细字典
+        class_lines = []
+        class_names = []
+        class_modifiers = []
+        class_nested_levels = []
+        for line_num, match in (iter_first_match_lines(_CLASS_PATTERN, source, offsets) if 'class' in source else ()):
+            if line_kinds[line_num] != LINE_CODE:
+                continue
+
+            modifiers = []
+            if 'export' in lines[line_num - 1]: modifiers.append('export')
+
+            # 类所在行的嵌套级别为其之前最近括号行处理后的级别
+            brace_index = bisect_left(brace_lines, line_num) - 1
+            class_lines.append(line_num)
+            class_names.append(match.group(1))
+            class_modifiers.append(modifiers)
+            class_nested_levels.append(brace_levels[brace_index] if brace_index >= 0 else 0)
+
+        # 统计函数，所属类为当前行及之前最近定义的类
+        function_lines = []
+        function_names = []
+        function_classes = []
+        for line_num, match in iter_first_match_lines(_FUNCTION_PATTERN, source, offsets):
+            if line_kinds[line_num] != LINE_CODE:
+                continue
+
+            class_index = bisect_right(class_lines, line_num) - 1
+            function_lines.append(line_num)
+            function_names.append(match.group(1))
+            function_classes.append(class_names[class_index] if class_index >= 0 else None)
+
+        # 统计方法（类内的函数）
+        method_lines = []
+        method_names = []
+        method_classes = []
+        for match in (_METHOD_PATTERN.finditer(source) if class_lines else ()):
+            line_num = line_number_at(offsets, match.start())
+            if line_kinds[line_num] != LINE_CODE:
+                continue
+
+            class_index = bisect_right(class_lines, line_num) - 1
+            method_name = match.group(1)
+            if class_index >= 0 and method_name not in _CONTROL_KEYWORDS:
+                method_lines.append(line_num)
+                method_names.append(method_name)
+                method_classes.append(class_names[class_index])
+
+        result.update({
+            'blank_lines': line_kinds.count(LINE_BLANK, 1),
+            'comment_lines': line_kinds.count(LINE_COMMENT, 1),
+            'code_lines': line_kinds.count(LINE_CODE, 1),
+            'max_nested_level': max_nested_level,
+            'imports': imports,
+            'exports': exports,
+            'variables': variables,
+            'classes': len(class_lines),
+        })
+        result['class_details'] = [
+            {'name': name, 'modifiers': modifiers, 'line': line_num, 'nested_level': nested_level}
+            for name, modifiers, line_num, nested_level
+            in zip(class_names, class_modifiers, class_lines, class_nested_levels)
+        ]
+        result['functions'] = len(function_lines)
+        result['function_details'] = [
+            {'name': name, 'line': line_num, 'type': 'function', 'class': class_name}
+            for name, line_num, class_name in zip(function_names, function_lines, function_classes)
+        ]
+        result['methods'] = len(method_lines)
+        result['method_details'] = [
+            {'name': name, 'line': line_num, 'type': 'method', 'class': class_name}
+            for name, line_num, class_name in zip(method_names, method_lines, method_classes)
+        ]
 
         # 计算复杂度
         result['complexity'] = _calculate_javascript_complexity(result)
@@ -192,6 +252,10 @@ def _calculate_javascript_complexity(analysis_result: Dict[str, Any]) -> int:
     """计算JavaScript代码复杂度"""
     complexity = 1  # 基础复杂度
 
+    # 各项统计均为0时只有基础复杂度
+    if not any(analysis_result[key] for key in _COMPLEXITY_KEYS):
+        return complexity
+
     # 基于类和方法数量
     complexity += analysis_result['classes'] * 2
     complexity += analysis_result['methods'] * 3
@@ -213,6 +277,10 @@ def _detect_javascript_code_smells(analysis_result: Dict[str, Any]) -> List[str]
     """检测JavaScript代码异味"""
     smells = []
 
+    # 所有统计都不超过最小阈值时不可能触发任何异味
+    if max(analysis_result[key] for key in _COMPLEXITY_KEYS) <= _MIN_SMELL_THRESHOLD:
+        return smells
+
     # 检查类数量过多
     if analysis_result['classes'] > 10:
         smells.append("类数量过多，可能存在职责分散问题")
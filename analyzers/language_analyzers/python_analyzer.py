@@ -6,17 +6,54 @@ Python代码复杂度分析器
 """
 
 import re
+import stat
 from pathlib import Path
 from typing import Dict, Any, List, Tuple
 import logging
 from ..language_analyzer_manager import LanguageAnalyzer
+from ..source_utils import (
+    read_source_bytes, decode_source, split_lines, newline_offsets, line_number_at,
+    iter_first_match_lines, classify_lines, mark_line_range,
+    LINE_CODE, LINE_BLANK, LINE_COMMENT, LINE_STRING
+)
 
 logger = logging.getLogger(__name__)
 
+# 整文件扫描用的预编译模式（MULTILINE，行首允许缩进；空白只匹配行内字符 [^\S\n]，保证匹配不跨行）
+# 类、函数、导入、装饰器在行首互斥，合并为一个带命名分组的模式
+_STRUCTURE_PATTERN = re.compile(r'''
+    ^[^\S\n]*(?:
+          class[^\S\n]+(?P<class>\w+)
+        | def[^\S\n]+(?P<function>\w+)
+        | (?P<import>(?:import|from)[ ])
+        | (?P<decorator>@)
+    )
+''', re.MULTILINE | re.VERBOSE)
+_BLOCK_START_PATTERN = re.compile(r':[^\S\n]*$', re.MULTILINE)
+_BLOCK_EXIT_PATTERN = re.compile(r'^[^\S\n]*(?:return|break|continue)', re.MULTILINE)
+# 字符串与注释的词法模式：注释、三引号字符串（可跨行，未闭合时到文件末尾）、单引号字符串（可用反斜杠续行）
+_STRING_OR_COMMENT_PATTERN = re.compile(r'''
+      \#[^\n]*
+    | \'\'\'[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*(?:\'\'\'|\Z)
+    | """[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*(?:"""|\Z)
+    | '[^'\\\n]*(?:\\.[^'\\\n]*)*'?
+    | "[^"\\\n]*(?:\\.[^"\\\n]*)*"?
+''', re.VERBOSE | re.DOTALL)
+_STRING_PREFIX_PATTERN = re.compile(r'[^\S\n]*[rRbBuUfF]{0,2}')
+
+# 参与复杂度计算与异味检测的统计项，以及异味检测的最小阈值（嵌套级别 > 5）
+_COMPLEXITY_KEYS = ('classes', 'methods', 'functions', 'max_nested_level', 'imports', 'decorators')
+_MIN_SMELL_THRESHOLD = 5
+
+# 风格检查中列出的超长行行号示例上限
+_LONG_LINE_EXAMPLE_LIMIT = 20
+
 
 class PythonAnalyzer(LanguageAnalyzer):
     """Python语言分析器"""
 
+    _EXTENSIONS = frozenset({'.py'})
+
     @property
     def language_name(self) -> str:
         return "python"
@@ -31,19 +68,16 @@ class PythonAnalyzer(LanguageAnalyzer):
 
     def can_analyze(self, file_path: Path) -> bool:
         """检查是否可以分析此文件"""
-        if not file_path.exists() or not file_path.is_file():
+        # 先检查扩展名，再用一次stat同时判断存在性、文件类型与大小
+        if file_path.suffix.lower() not in self._EXTENSIONS:
             return False
 
-        # 检查文件大小
         try:
-            file_size = file_path.stat().st_size
-            if file_size > 10 * 1024 * 1024:  # 10MB
-                return False
+            file_stat = file_path.stat()
         except OSError:
             return False
 
-        # 检查文件扩展名
-        return file_path.suffix.lower() == '.py'
+        return stat.S_ISREG(file_stat.st_mode) and file_stat.st_size <= 10 * 1024 * 1024  # 10MB
 
     def analyze(self, file_path: Path) -> Dict[str, Any]:
         """分析Python文件复杂度"""
@@ -75,91 +109,104 @@ def analyze_python_complexity_detailed(file_path: Path) -> Dict[str, Any]:
     }
 
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
+        raw = read_source_bytes(file_path)
+        source = decode_source(raw)
+        lines = split_lines(source)
+        offsets = newline_offsets(source)
 
         result['lines'] = len(lines)
-        in_multiline_comment = False
-        current_nested_level = 0
-        current_class = None
-        current_function = None
 
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
+        # 空文件：各项统计均为0，直接给出基础复杂度
+        if not lines:
+            result['complexity'] = _calculate_python_complexity(result)
+            return result
 
-            # 跳过空行
-            if not line:
-                result['blank_lines'] += 1
-                continue
+        # 行分类：空行、#注释行、文档字符串（按注释统计）、多行字符串
+        line_kinds = classify_lines(lines, ('#',), raw)
+        if '"' in source or "'" in source:
+            _mark_string_lines(line_kinds, source, offsets)
 
-            # 处理多行注释
-            if '"""' in line or "'''" in line:
-                if line.count('"""') % 2 == 1 or line.count("'''") % 2 == 1:
-                    in_multiline_comment = not in_multiline_comment
-                result['comment_lines'] += 1
-                continue
-            elif in_multiline_comment:
-                result['comment_lines'] += 1
-                continue
+        # 各项计数使用局部变量累加，扫描结束后统一写入结果
+        # 统计嵌套级别：只处理以冒号结尾（+1）或以return/break/continue开头（-1）的代码行
+        nesting_changes = {}
+        for line_num, _ in iter_first_match_lines(_BLOCK_EXIT_PATTERN, source, offsets):
+            nesting_changes[line_num] = -1
+        for line_num, _ in iter_first_match_lines(_BLOCK_START_PATTERN, source, offsets):
+            nesting_changes[line_num] = 1
 
-            # 单行注释
-            if line.startswith('#') or line.startswith('"""') or line.startswith("'''"):
-                result['comment_lines'] += 1
+        current_nested_level = 0
+        max_nested_level = 0
+        for line_num in sorted(nesting_changes):
+            if line_kinds[line_num] != LINE_CODE:
                 continue
-
-            # 统计代码行
-            result['code_lines'] += 1
-
-            # 检测模块系统
-            if line.startswith('import ') or line.startswith('from '):
-                result['imports'] += 1
-                if 'as ' in line:
-                    result['module_system'] = 'aliased_imports'
-
-            # 统计装饰器
-            if line.startswith('@'):
-                result['decorators'] += 1
-
-            # 统计类
-            class_match = re.search(r'^class\s+(\w+)', line)
-            if class_match:
-                result['classes'] += 1
-                current_class = class_match.group(1)
-                result['class_details'].append({
-                    'name': current_class,
-                    'line': line_num,
-                    'type': 'class'
-                })
-
-            # 统计函数
-            function_match = re.search(r'^def\s+(\w+)', line)
-            if function_match:
-                result['functions'] += 1
-                current_function = function_match.group(1)
-                result['function_details'].append({
-                    'name': current_function,
-                    'line': line_num,
-                    'type': 'function',
-                    'class': current_class
-                })
-
-            # 统计方法（类内的函数）
-            if current_class and function_match:
-                result['methods'] += 1
-                result['method_details'].append({
-                    'name': current_function,
-                    'line': line_num,
-                    'type': 'method',
-                    'class': current_class
-                })
-
-            # 统计嵌套级别
-            if line.endswith(':'):
+            if nesting_changes[line_num] > 0:
                 current_nested_level += 1
-                result['max_nested_level'] = max(result['max_nested_level'], current_nested_level)
-            elif line.startswith('return') or line.startswith('break') or line.startswith('continue'):
+                if current_nested_level > max_nested_level:
+                    max_nested_level = current_nested_level
+            else:
                 current_nested_level = max(0, current_nested_level - 1)
 
+        # 导入、装饰器、类、函数定义均以行首关键字区分，合并为一个模式整文件扫描一遍，
+        # 按命中的分组分派；行号通过换行偏移表二分定位。类与函数按字段收集到并列列表，
+        # 扫描结束后再一次性生成明细字典
+        imports = 0
+        decorators = 0
+        module_system = result['module_system']
+        class_lines = []
+        class_names = []
+        function_lines = []
+        function_names = []
+        function_classes = []
+        for match in _STRUCTURE_PATTERN.finditer(source):
+            line_num = line_number_at(offsets, match.start())
+            if line_kinds[line_num] != LINE_CODE:
+                continue
+
+            kind = match.lastgroup
+            if kind == 'function':
+                # 函数所属类为其之前最近定义的类（按源码顺序扫描，即最后记录的类）
+                function_lines.append(line_num)
+                function_names.append(match.group(kind))
+                function_classes.append(class_names[-1] if class_names else None)
+            elif kind == 'class':
+                class_lines.append(line_num)
+                class_names.append(match.group(kind))
+            elif kind == 'import':
+                # 检测模块系统
+                imports += 1
+                if 'as ' in lines[line_num - 1].strip():
+                    module_system = 'aliased_imports'
+            else:
+                decorators += 1
+
+        result.update({
+            'blank_lines': line_kinds.count(LINE_BLANK, 1),
+            'comment_lines': line_kinds.count(LINE_COMMENT, 1),
+            'code_lines': line_kinds.count(LINE_CODE, 1) + line_kinds.count(LINE_STRING, 1),
+            'max_nested_level': max_nested_level,
+            'imports': imports,
+            'module_system': module_system,
+            'decorators': decorators,
+            'classes': len(class_lines),
+        })
+        result['class_details'] = [
+            {'name': name, 'line': line_num, 'type': 'class'}
+            for name, line_num in zip(class_names, class_lines)
+        ]
+        result['functions'] = len(function_lines)
+        result['function_details'] = [
+            {'name': name, 'line': line_num, 'type': 'function', 'class': class_name}
+            for name, line_num, class_name in zip(function_names, function_lines, function_classes)
+        ]
+
+        # 统计方法（类内的函数）
+        result['method_details'] = [
+            {'name': name, 'line': line_num, 'type': 'method', 'class': class_name}
+            for name, line_num, class_name in zip(function_names, function_lines, function_classes)
+            if class_name
+        ]
+        result['methods'] = len(result['method_details'])
+
         # 计算复杂度
         result['complexity'] = _calculate_python_complexity(result)
 
@@ -173,10 +220,45 @@ def analyze_python_complexity_detailed(file_path: Path) -> Dict[str, Any]:
     return result
 
 
+def _mark_string_lines(line_kinds: bytearray, source: str, offsets: List[int]):
+    """
+    按Python词法扫描字符串与注释，标记字符串所在的行
+
+    单独成行的三引号字符串（文档字符串）整体标记为注释行；其他跨行字符串的后续行
+    标记为字符串行，避免字符串内容被当作注释或类/函数定义。注释中的引号不会被误判。
+    """
+    for match in _STRING_OR_COMMENT_PATTERN.finditer(source):
+        text = match.group()
+        if text[0] == '#':
+            continue
+
+        is_triple_quoted = text.startswith('"""') or text.startswith("'''")
+        if not is_triple_quoted and '\n' not in text:
+            continue
+
+        start_line = line_number_at(offsets, match.start())
+        end_line = line_number_at(offsets, match.end() - 1)
+
+        if is_triple_quoted:
+            line_start = offsets[start_line - 2] + 1 if start_line > 1 else 0
+            line_end = offsets[end_line - 1] if end_line <= len(offsets) else len(source)
+            before = source[line_start:match.start()]
+            after = source[match.end():line_end].strip()
+            if _STRING_PREFIX_PATTERN.fullmatch(before) and (not after or after.startswith('#')):
+                mark_line_range(line_kinds, start_line, end_line + 1, LINE_COMMENT)
+                continue
+
+        mark_line_range(line_kinds, start_line + 1, end_line + 1, LINE_STRING)
+
+
 def _calculate_python_complexity(analysis_result: Dict[str, Any]) -> int:
     """计算Python代码复杂度"""
     complexity = 1  # 基础复杂度
 
+    # 各项统计均为0时只有基础复杂度
+    if not any(analysis_result[key] for key in _COMPLEXITY_KEYS):
+        return complexity
+
     # 基于类和方法数量
     complexity += analysis_result['classes'] * 2
     complexity += analysis_result['methods'] * 3
@@ -198,6 +280,10 @@ def _detect_python_code_smells(analysis_result: Dict[str, Any]) -> List[str]:
     """检测Python代码异味"""
     smells = []
 
+    # 所有统计都不超过最小阈值时不可能触发任何异味
+    if max(analysis_result[key] for key in _COMPLEXITY_KEYS) <= _MIN_SMELL_THRESHOLD:
+        return smells
+
     # 检查类数量过多
     if analysis_result['classes'] > 10:
         smells.append("类数量过多，可能存在职责分散问题")
@@ -299,10 +385,22 @@ def analyze_python_style(file_path: Path) -> Dict[str, Any]:
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
             lines = f.readlines()
 
-        long_lines = [i+1 for i, line in enumerate(lines) if len(line.rstrip()) > 79]
-        if long_lines:
-            style_result['style_score'] -= len(long_lines) * 2
-            style_result['style_issues'].append(f"第{', '.join(map(str, long_lines))}行超过79字符")
+        # 只记录超长行总数与前若干个行号示例，避免超大文件生成巨大的行号列表和提示文本
+        long_line_count = 0
+        long_line_examples = []
+        for i, line in enumerate(lines):
+            if len(line) > 79 and len(line.rstrip()) > 79:
+                long_line_count += 1
+                if len(long_line_examples) < _LONG_LINE_EXAMPLE_LIMIT:
+                    long_line_examples.append(i+1)
+
+        if long_line_count:
+            style_result['style_score'] -= long_line_count * 2
+            examples = ', '.join(map(str, long_line_examples))
+            if long_line_count > _LONG_LINE_EXAMPLE_LIMIT:
+                style_result['style_issues'].append(f"第{examples}等共{long_line_count}行超过79字符")
+            else:
+                style_result['style_issues'].append(f"第{examples}行超过79字符")
 
         # 检查空行使用
         consecutive_blank_lines = 0
@@ -315,16 +413,17 @@ def analyze_python_style(file_path: Path) -> Dict[str, Any]:
                     style_result['style_issues'].append(f"第{i}行附近存在过多连续空行")
                 consecutive_blank_lines = 0
 
-        # 检查导入语句位置
-        import_lines = []
-        code_lines = []
+        # 检查导入语句位置：只需记录首个代码行与最后一个导入行
+        first_code_line = None
+        last_import_line = 0
         for i, line in enumerate(lines):
-            if line.strip().startswith(('import ', 'from ')):
-                import_lines.append(i+1)
-            elif line.strip() and not line.strip().startswith('#'):
-                code_lines.append(i+1)
+            line = line.strip()
+            if line.startswith(('import ', 'from ')):
+                last_import_line = i+1
+            elif first_code_line is None and line and not line.startswith('#'):
+                first_code_line = i+1
 
-        if code_lines and import_lines and min(code_lines) < max(import_lines):
+        if first_code_line is not None and first_code_line < last_import_line:
             style_result['style_score'] -= 5
             style_result['style_issues'].append("导入语句应该放在文件开头")
 
@@ -339,7 +438,7 @@ def analyze_python_style(file_path: Path) -> Dict[str, Any]:
             style_result['pep8_compliance'] = 'poor'
 
         # 生成建议
-        if long_lines:
+        if long_line_count:
             style_result['recommendations'].append("将长行拆分为多行，提高可读性")
 
         if style_result['pep8_compliance'] in ['fair', 'poor']:
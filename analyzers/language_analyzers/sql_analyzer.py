@@ -5,18 +5,72 @@ SQL代码复杂度分析器
 专门分析SQL代码的复杂度、结构和质量指标
 """
 
+import copy
+import mmap
 import re
+import stat
+from itertools import accumulate
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Iterator, Union
 import logging
 from ..language_analyzer_manager import LanguageAnalyzer
+from ..source_utils import (
+    read_source_bytes, decode_source, split_lines, classify_lines, stat_keyed_cache,
+    LINE_BLANK, LINE_COMMENT, NUMPY_AVAILABLE, np
+)
 
 logger = logging.getLogger(__name__)
 
+# 预编译的SQL模式（关键字不区分大小写）
+_STATEMENT_SEPARATOR_PATTERN = re.compile(r';\s*\n')
+# 语句词法扫描：一次遍历产出注释/字符串字面量、子查询、表名、JOIN目标、CREATE对象、函数调用、
+# SELECT及其他语句类型关键字。
+# 模式以单个非单词字符开头（该字符由后置断言区分含义，之后的单词用前瞻识别），
+# 正则引擎可直接跳过单词内部的字符，不必在每个位置尝试全部分支；
+# 关键字分支先用首字母字符集统一过滤，多数单词一次判断即可跳过全部关键字分支
+# （后跟左括号的关键字仍按函数调用识别，与分支顺序调整前一致）
+_SQL_TOKEN_PATTERN = re.compile(r'''
+    [^\w]
+    (?:
+        (?P<literal>
+              (?<=-)-[^\n]*
+            | (?<=/)\*.*?(?:\*/|\Z)
+            | (?<=')[^']*'?
+            | (?<=")[^"]*"?
+            | (?<=`)[^`]*`?
+        )
+      | (?<=\()(?=(?P<subquery>\s*SELECT))
+      | (?=
+            (?=[fjcsiuda])
+            (?:
+                  FROM\s+(?P<table>\w+)
+                | JOIN\s+(?P<join>\w+)
+                | CREATE\s+(?P<create>VIEW|PROCEDURE|TABLE)\b
+                | (?P<select>SELECT)\b(?!\s*\()
+                | (?P<statement_type>INSERT|UPDATE|DELETE|CREATE|ALTER|DROP)\b(?!\s*\()
+            )
+          | (?P<function>\w+)\s*\(
+        )
+    )
+''', re.IGNORECASE | re.VERBOSE | re.DOTALL)
+_FUNCTION_CALL_PATTERN = re.compile(r'(\w+)\s*\(')
+_PAREN_PATTERN = re.compile(r'[()]')
+_PAREN_DEPTH_STEPS = {'(': 1, ')': -1}
+# 安全检查：动态SQL执行与过度授权的关键字合并为一个交替模式（不区分大小写），一次扫描全文；
+# 关键字均为ASCII，直接扫描原始字节，无需解码或生成大小写转换后的副本
+_SECURITY_PATTERN = re.compile(
+    rb'(?P<exec>EXEC(?:UTE)?\()|(?P<sp_executesql>sp_executesql)|(?P<grant_all>GRANT ALL)', re.IGNORECASE
+)
+_SECURITY_CHECKS = frozenset({'exec', 'sp_executesql', 'grant_all'})
+# 使用NumPy计算括号深度的最小语句长度，短语句上NumPy的固定开销超过逐个累计
+_VECTORIZE_MIN_CHARS = 2048
+
 
 class SQLAnalyzer(LanguageAnalyzer):
     """SQL语言分析器"""
 
+    _EXTENSIONS = frozenset({'.sql'})
+
     @property
     def language_name(self) -> str:
         return "sql"
@@ -31,28 +85,86 @@ class SQLAnalyzer(LanguageAnalyzer):
 
     def can_analyze(self, file_path: Path) -> bool:
         """检查是否可以分析此文件"""
-        if not file_path.exists() or not file_path.is_file():
+        # 先检查扩展名，再用一次stat同时判断存在性、文件类型与大小
+        if file_path.suffix.lower() not in self._EXTENSIONS:
             return False
 
-        # 检查文件大小
         try:
-            file_size = file_path.stat().st_size
-            if file_size > 10 * 1024 * 1024:  # 10MB
-                return False
+            file_stat = file_path.stat()
         except OSError:
             return False
 
-        # 检查文件扩展名
-        return file_path.suffix.lower() == '.sql'
+        return stat.S_ISREG(file_stat.st_mode) and file_stat.st_size <= 10 * 1024 * 1024  # 10MB
 
     def analyze(self, file_path: Path) -> Dict[str, Any]:
         """分析SQL文件复杂度"""
         return analyze_sql_complexity_detailed(file_path)
 
 
-def analyze_sql_complexity_detailed(file_path: Path) -> Dict[str, Any]:
-    """详细分析SQL代码复杂度"""
-    result = {
+def analyze_sql_complexity_detailed(file_path: Path, include_details: bool = True) -> Dict[str, Any]:
+    """
+    详细分析SQL代码复杂度
+
+    Args:
+        file_path: SQL文件路径
+        include_details: 是否收集 statement_details；为False时只统计数量，
+            不生成表名、函数名等明细列表（statement_details 保持为空）
+    """
+    result = _new_complexity_result(file_path)
+
+    try:
+        # 大文件经内存映射读取
+        raw = read_source_bytes(file_path)
+        _complexity_from_content(result, decode_source(raw), raw, include_details)
+
+    except Exception as e:
+        logger.error(f"分析SQL文件失败 {file_path}: {e}")
+        result['error'] = f"分析失败: {str(e)}"
+
+    return result
+
+
+def analyze_sql_all(file_path: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    一次读取SQL文件，同时完成复杂度、架构与安全性分析
+
+    Returns:
+        {'complexity': ..., 'architecture': ..., 'security': ...}，各项与
+        analyze_sql_complexity_detailed / analyze_sql_architecture / analyze_sql_security 的结果一致
+    """
+    complexity_result = _new_complexity_result(file_path)
+    security_result = _new_security_result()
+
+    try:
+        raw = read_source_bytes(file_path)
+        content = decode_source(raw)
+    except Exception as e:
+        logger.error(f"分析SQL文件失败 {file_path}: {e}")
+        complexity_result['error'] = f"分析失败: {str(e)}"
+        security_result['error'] = f"分析SQL安全性失败: {str(e)}"
+        return {'complexity': complexity_result, 'architecture': complexity_result, 'security': security_result}
+
+    try:
+        _complexity_from_content(complexity_result, content, raw)
+    except Exception as e:
+        logger.error(f"分析SQL文件失败 {file_path}: {e}")
+        complexity_result['error'] = f"分析失败: {str(e)}"
+
+    try:
+        _security_from_content(security_result, raw)
+    except Exception as e:
+        security_result['error'] = f"分析SQL安全性失败: {str(e)}"
+
+    return {
+        'complexity': complexity_result,
+        'architecture': _architecture_from_complexity(file_path, complexity_result),
+        'security': security_result
+    }
+
+
+def _new_complexity_result(file_path: Path) -> Dict[str, Any]:
+    """复杂度分析结果的初始结构"""
+    return {
         'file_path': str(file_path),
         'file_type': 'sql',
         'lines': 0,
@@ -76,112 +188,216 @@ def analyze_sql_complexity_detailed(file_path: Path) -> Dict[str, Any]:
         'code_smells': []
     }
 
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-
-        lines = content.split('\n')
-        result['lines'] = len(lines)
-
-        # 统计空行和注释行
-        for line in lines:
-            line = line.strip()
-            if not line:
-                result['blank_lines'] += 1
-            elif line.startswith('--') or line.startswith('/*') or line.startswith('*'):
-                result['comment_lines'] += 1
-
-        result['code_lines'] = result['lines'] - result['blank_lines'] - result['comment_lines']
-
-        # 分析SQL语句
-        sql_statements = re.split(r';\s*\n', content, flags=re.IGNORECASE)
-
-        for statement in sql_statements:
-            statement = statement.strip()
-            if not statement:
-                continue
-
-            result['statements'] += 1
-
-            # 初始化变量
-            table_matches = []
-            join_matches = []
-            subquery_matches = []
-            function_matches = []
-            nested_level = 0
-
-            # 检测查询类型
-            if re.search(r'\bSELECT\b', statement, re.IGNORECASE):
-                result['queries'] += 1
-
-                # 统计表数量
-                table_matches = re.findall(r'\bFROM\s+(\w+)', statement, re.IGNORECASE)
-                result['tables'] += len(table_matches)
-
-                # 统计JOIN数量
-                join_matches = re.findall(r'\bJOIN\s+(\w+)', statement, re.IGNORECASE)
-                result['joins'] += len(join_matches)
-
-                # 统计子查询数量
-                subquery_matches = re.findall(r'\(\s*SELECT', statement, re.IGNORECASE)
-                result['subqueries'] += len(subquery_matches)
-
-                # 统计函数数量
-                function_matches = re.findall(r'\b(\w+)\s*\(', statement, re.IGNORECASE)
-                result['functions'] += len(function_matches)
-
-                # 计算嵌套级别
-                nested_level = statement.count('(') - statement.count(')')
-                result['max_nested_level'] = max(result['max_nested_level'], nested_level)
-
-            # 检测视图定义
-            if re.search(r'\bCREATE\s+VIEW\b', statement, re.IGNORECASE):
-                result['views'] += 1
-
-            # 检测存储过程定义
-            if re.search(r'\bCREATE\s+PROCEDURE\b', statement, re.IGNORECASE):
-                result['procedures'] += 1
-
-            # 检测表定义
-            if re.search(r'\bCREATE\s+TABLE\b', statement, re.IGNORECASE):
-                result['tables'] += 1
-
-                # 记录语句详情
-                statement_type = 'SELECT'
-                if re.search(r'\bINSERT\b', statement, re.IGNORECASE):
-                    statement_type = 'INSERT'
-                elif re.search(r'\bUPDATE\b', statement, re.IGNORECASE):
-                    statement_type = 'UPDATE'
-                elif re.search(r'\bDELETE\b', statement, re.IGNORECASE):
-                    statement_type = 'DELETE'
-                elif re.search(r'\bCREATE\b', statement, re.IGNORECASE):
-                    statement_type = 'CREATE'
-                elif re.search(r'\bALTER\b', statement, re.IGNORECASE):
-                    statement_type = 'ALTER'
-                elif re.search(r'\bDROP\b', statement, re.IGNORECASE):
-                    statement_type = 'DROP'
-
-                result['statement_details'].append({
-                    'type': statement_type,
-                    'tables': table_matches,
-                    'joins': join_matches,
-                    'subqueries': subquery_matches,
-                    'functions': function_matches,
-                    'nested_level': nested_level
-                })
-
-        # 计算复杂度
-        result['complexity'] = _calculate_sql_complexity(result)
-        result['complexity_score'] = result['complexity']
-
-        # 检测代码异味
-        result['code_smells'] = _detect_sql_code_smells(result)
 
-    except Exception as e:
-        logger.error(f"分析SQL文件失败 {file_path}: {e}")
-        result['error'] = f"分析失败: {str(e)}"
-
-    return result
+def _complexity_from_content(result: Dict[str, Any], content: str, raw=None, include_details: bool = True):
+    """基于已解码的源码填充复杂度分析结果（不做文件读取），raw为原始字节，用于向量化行分类"""
+    # 行数直接由换行符计数得到
+    result['lines'] = content.count('\n') + 1
+
+    # 统计空行和注释行（以换行结尾时最后的空串同样计为一个空行）
+    lines = split_lines(content)
+    line_kinds = classify_lines(lines, ('--', '/*', '*'), raw)
+    result['blank_lines'] = line_kinds.count(LINE_BLANK, 1) + result['lines'] - len(lines)
+    result['comment_lines'] = line_kinds.count(LINE_COMMENT, 1)
+
+    result['code_lines'] = result['lines'] - result['blank_lines'] - result['comment_lines']
+
+    # 分析SQL语句，语句明细按字段收集到并列列表，扫描结束后再一次性生成明细字典。
+    # 语句在当前线程内顺序扫描：正则匹配期间不释放GIL，线程池无法并行；
+    # 按语句分发到进程池需要序列化每条语句及其结果，开销高于扫描本身
+    # 每个分隔符都含一个分号，分号数加一即为语句数上限；
+    # 明细列按该上限预先分配，按语句序号写入，生成明细时只取已写入的部分
+    detail_capacity = content.count(';') + 1 if include_details else 0
+    detail_types = [None] * detail_capacity
+    detail_tables = [None] * detail_capacity
+    detail_joins = [None] * detail_capacity
+    detail_subqueries = [None] * detail_capacity
+    detail_functions = [None] * detail_capacity
+    detail_nested_levels = [0] * detail_capacity
+
+    # 各项计数使用局部变量累加，扫描结束后统一写入结果
+    statements = queries = tables = joins = subqueries = functions = 0
+    views = procedures = max_nested_level = 0
+
+    for statement in _iter_sql_statements(content):
+        tokens = _scan_sql_statement(statement, include_details)
+        counts = tokens['counts']
+        select = tokens['select']
+
+        # 检测查询类型：表、JOIN、子查询、函数数量与嵌套级别只统计查询语句
+        if select:
+            queries += 1
+            tables += counts['tables']
+            joins += counts['joins']
+            subqueries += counts['subqueries']
+            functions += counts['functions']
+            if tokens['nested_level'] > max_nested_level:
+                max_nested_level = tokens['nested_level']
+
+        # 检测视图、存储过程与表定义
+        creates = tokens['creates']
+        if creates:
+            if 'VIEW' in creates:
+                views += 1
+            if 'PROCEDURE' in creates:
+                procedures += 1
+            if 'TABLE' in creates:
+                tables += 1
+
+        # 记录语句详情（非查询语句的明细为空）
+        if include_details:
+            detail_types[statements] = tokens['type']
+            detail_tables[statements] = tokens['tables'] if select else []
+            detail_joins[statements] = tokens['joins'] if select else []
+            detail_subqueries[statements] = tokens['subqueries'] if select else []
+            detail_functions[statements] = tokens['functions'] if select else []
+            detail_nested_levels[statements] = tokens['nested_level']
+
+        statements += 1
+
+    result.update({
+        'statements': statements,
+        'queries': queries,
+        'tables': tables,
+        'views': views,
+        'procedures': procedures,
+        'joins': joins,
+        'subqueries': subqueries,
+        'functions': functions,
+        'max_nested_level': max_nested_level,
+    })
+    result['statement_details'] = [
+        {
+            'type': detail_types[index],
+            'tables': detail_tables[index],
+            'joins': detail_joins[index],
+            'subqueries': detail_subqueries[index],
+            'functions': detail_functions[index],
+            'nested_level': detail_nested_levels[index]
+        }
+        for index in range(statements if include_details else 0)
+    ]
+
+    # 计算复杂度
+    result['complexity'] = _calculate_sql_complexity(result)
+    result['complexity_score'] = result['complexity']
+
+    # 检测代码异味
+    result['code_smells'] = _detect_sql_code_smells(result)
+
+
+def _iter_sql_statements(content: str) -> Iterator[str]:
+    """按分隔符逐条产出去除首尾空白后的非空语句，只按匹配位置切片，不生成完整的切分列表"""
+    start = 0
+    for match in _STATEMENT_SEPARATOR_PATTERN.finditer(content):
+        statement = content[start:match.start()].strip()
+        if statement:
+            yield statement
+        start = match.end()
+    statement = content[start:].strip()
+    if statement:
+        yield statement
+
+
+def _scan_sql_statement(statement: str, include_details: bool = True) -> Dict[str, Any]:
+    """
+    单次扫描SQL语句，收集语句类型（首个语句类型关键字，默认SELECT）、查询、表、JOIN、
+    子查询、函数调用、CREATE对象，查询语句另外计算括号的最大嵌套深度
+
+    注释和字符串字面量中的关键字与括号不计入统计。
+    表、JOIN、子查询、函数始终计入 counts；include_details 为False时不收集名称列表。
+    """
+    tokens = {
+        'type': None,
+        'select': False,
+        'counts': {'tables': 0, 'joins': 0, 'subqueries': 0, 'functions': 0},
+        'tables': [],
+        'joins': [],
+        'subqueries': [],
+        'functions': [],
+        'creates': set(),
+        'nested_level': 0
+    }
+    counts = tokens['counts']
+    literal_spans = []
+
+    # 前补一个空格，使语句开头的单词同样位于非单词字符之后
+    text = ' ' + statement
+    for match in _SQL_TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'function':
+            name = match.group(kind)
+            counts['functions'] += 1
+            if include_details:
+                tokens['functions'].append(name)
+            if name.upper() == 'SELECT':
+                tokens['select'] = True
+                tokens['type'] = tokens['type'] or 'SELECT'
+        elif kind == 'literal':
+            # 记录含括号的注释与字符串，计算嵌套深度时剔除
+            literal = match.group(kind)
+            if '(' in literal or ')' in literal:
+                literal_spans.append(match.span(kind))
+        elif kind == 'select':
+            tokens['select'] = True
+            tokens['type'] = tokens['type'] or 'SELECT'
+        elif kind == 'statement_type':
+            tokens['type'] = tokens['type'] or match.group(kind).upper()
+        elif kind == 'table':
+            counts['tables'] += 1
+            if include_details:
+                tokens['tables'].append(match.group(kind))
+        elif kind == 'join':
+            counts['joins'] += 1
+            if include_details:
+                tokens['joins'].append(match.group(kind))
+        elif kind == 'subquery':
+            tokens['select'] = True
+            tokens['type'] = tokens['type'] or 'SELECT'
+            counts['subqueries'] += 1
+            if include_details:
+                tokens['subqueries'].append('(' + match.group(kind))
+            # 子查询分支占用了左括号位置，紧随其后的 SELECT(...) 调用需单独识别
+            call = _FUNCTION_CALL_PATTERN.match(text, match.end())
+            if call:
+                counts['functions'] += 1
+                if include_details:
+                    tokens['functions'].append(call.group(1))
+        else:
+            tokens['creates'].add(match.group(kind).upper())
+            tokens['type'] = tokens['type'] or 'CREATE'
+
+    tokens['type'] = tokens['type'] or 'SELECT'
+    if tokens['select']:
+        if literal_spans:
+            segments = []
+            position = 0
+            for start, end in literal_spans:
+                segments.append(text[position:start])
+                position = end
+            segments.append(text[position:])
+            text = ''.join(segments)
+        tokens['nested_level'] = _max_paren_depth(text)
+
+    return tokens
+
+
+def _max_paren_depth(text: str) -> int:
+    """按出现顺序累计括号深度，返回最大嵌套深度（NumPy可用时长语句按字节向量化累计）"""
+    if NUMPY_AVAILABLE and len(text) >= _VECTORIZE_MIN_CHARS:
+        # 括号均为ASCII，UTF-8编码后的多字节字符不会与其混淆
+        buf = np.frombuffer(text.encode('utf-8', 'surrogatepass'), dtype=np.uint8)
+        depths = np.cumsum((buf == 40).astype(np.int32) - (buf == 41))
+        return max(0, int(depths.max()))
+
+    parens = _PAREN_PATTERN.findall(text)
+    if not parens:
+        return 0
+    return max(0, max(accumulate(map(_PAREN_DEPTH_STEPS.__getitem__, parens))))
+
+
+# 复杂度分析结果缓存（共享对象，调用方只读）
+_lookup_complexity = stat_keyed_cache(analyze_sql_complexity_detailed)
 
 
 def _calculate_sql_complexity(analysis_result: Dict[str, Any]) -> int:
@@ -242,10 +458,14 @@ def _detect_sql_code_smells(analysis_result: Dict[str, Any]) -> List[str]:
 
 def analyze_sql_architecture(file_path: Path) -> Dict[str, Any]:
     """分析SQL代码架构"""
-    complexity_result = analyze_sql_complexity_detailed(file_path)
+    # 架构分析只用到各项计数，不收集语句明细；结果取自缓存，重复分析未修改的文件时不再重新读取与解析
+    return _architecture_from_complexity(file_path, _lookup_complexity(file_path, False))
 
+
+def _architecture_from_complexity(file_path: Path, complexity_result: Dict[str, Any]) -> Dict[str, Any]:
+    """根据复杂度分析结果推导架构分析结果（不修改传入的复杂度结果）"""
     if 'error' in complexity_result:
-        return complexity_result
+        return copy.deepcopy(complexity_result)
 
     architecture_result = {
         'file_path': str(file_path),
@@ -301,40 +521,54 @@ def analyze_sql_architecture(file_path: Path) -> Dict[str, Any]:
 
 def analyze_sql_security(file_path: Path) -> Dict[str, Any]:
     """分析SQL代码安全性"""
-    result = {
-        'security_issues': [],
-        'vulnerability_level': 'low',
-        'recommendations': []
-    }
+    result = _new_security_result()
 
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+        _security_from_content(result, read_source_bytes(file_path))
 
-        # 检测SQL注入风险
-        if 'EXEC(' in content.upper() or 'EXECUTE(' in content.upper():
-            result['security_issues'].append('动态SQL执行 (EXEC/EXECUTE)')
-            result['vulnerability_level'] = 'high'
-
-        if 'sp_executesql' in content.lower():
-            result['security_issues'].append('动态SQL执行 (sp_executesql)')
-            result['vulnerability_level'] = 'medium'
+    except Exception as e:
+        result['error'] = f"分析SQL安全性失败: {str(e)}"
 
-        # 检测权限问题
-        if 'GRANT ALL' in content.upper():
-            result['security_issues'].append('过度授权 (GRANT ALL)')
-            result['vulnerability_level'] = 'medium'
+    return result
 
-        # 生成安全建议
-        if result['vulnerability_level'] == 'high':
-            result['recommendations'].append('使用参数化查询替代动态SQL')
-            result['recommendations'].append('实施最小权限原则')
 
-        if result['vulnerability_level'] == 'medium':
-            result['recommendations'].append('审查动态SQL的使用')
-            result['recommendations'].append('限制数据库用户权限')
+def _new_security_result() -> Dict[str, Any]:
+    """安全性分析结果的初始结构"""
+    return {
+        'security_issues': [],
+        'vulnerability_level': 'low',
+        'recommendations': []
+    }
 
-    except Exception as e:
-        result['error'] = f"分析SQL安全性失败: {str(e)}"
 
-    return result
+def _security_from_content(result: Dict[str, Any], raw: Union[bytes, mmap.mmap]):
+    """基于源码原始字节填充安全性分析结果（不做文件读取）"""
+    # 一次扫描找出出现过的检查项，全部命中后提前结束
+    found = set()
+    for match in _SECURITY_PATTERN.finditer(raw):
+        found.add(match.lastgroup)
+        if found == _SECURITY_CHECKS:
+            break
+
+    # 检测SQL注入风险
+    if 'exec' in found:
+        result['security_issues'].append('动态SQL执行 (EXEC/EXECUTE)')
+        result['vulnerability_level'] = 'high'
+
+    if 'sp_executesql' in found:
+        result['security_issues'].append('动态SQL执行 (sp_executesql)')
+        result['vulnerability_level'] = 'medium'
+
+    # 检测权限问题
+    if 'grant_all' in found:
+        result['security_issues'].append('过度授权 (GRANT ALL)')
+        result['vulnerability_level'] = 'medium'
+
+    # 生成安全建议
+    if result['vulnerability_level'] == 'high':
+        result['recommendations'].append('使用参数化查询替代动态SQL')
+        result['recommendations'].append('实施最小权限原则')
+
+    if result['vulnerability_level'] == 'medium':
+        result['recommendations'].append('审查动态SQL的使用')
+        result['recommendations'].append('限制数据库用户权限')
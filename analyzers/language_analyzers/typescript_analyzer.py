@@ -5,18 +5,45 @@ TypeScript代码复杂度分析器
 专门分析TypeScript代码的复杂度、结构和质量指标
 """
 
+import copy
 import re
+import stat
+from bisect import bisect_left, bisect_right
 from pathlib import Path
 from typing import Dict, Any, List, Tuple
 import logging
 from ..language_analyzer_manager import LanguageAnalyzer
+from ..source_utils import (
+    read_source_bytes, decode_source, split_lines, newline_offsets, line_number_at,
+    iter_first_match_lines, classify_lines, mark_block_comment_lines, stat_keyed_cache,
+    BRACE_TOKEN_PATTERN, LINE_CODE, LINE_BLANK, LINE_COMMENT
+)
 
 logger = logging.getLogger(__name__)
 
+# 整文件扫描用的预编译模式，空白只匹配行内字符（[^\S\n]），保证匹配不跨行；
+# 关键字字面量在前、单词边界用后置断言校验，使正则引擎可以按字面量前缀快速定位
+_IMPORT_PATTERN = re.compile(r'^[^\S\n]*import ', re.MULTILINE)
+_EXPORT_PATTERN = re.compile(r'^[^\S\n]*export ', re.MULTILINE)
+# 类型定义：行内出现 "type " 或 "interface "（其后同一行还有非空白字符）
+_TYPE_PATTERN = re.compile(r'(?:type|interface) (?=[^\n]*\S)')
+# 接口、类与函数（function/const）声明合并为一个交替模式，一次扫描完成；
+# 各分支均以关键字字面量开头（正则引擎按首字符集合快速定位），
+# 单词边界用后置断言校验，名称在前瞻断言内捕获、不消耗字符，同一行内的不同声明互不遮挡
+_DECLARATION_PATTERN = re.compile(r'''
+      interface(?<!\winterface)(?=[^\S\n]+(?P<interface>\w+))
+    | class(?<!\wclass)(?=[^\S\n]+(?P<class>\w+))
+    | function(?<!\wfunction)(?=[^\S\n]+(?P<function>\w+))
+    | const(?<!\wconst)(?=[^\S\n]+(?P<const>\w+))
+''', re.VERBOSE)
+_METHOD_PATTERN = re.compile(r'\b(\w+)[^\S\n]*\([^)\n]*\)[^\S\n]*[:{=]')
+
 
 class TypeScriptAnalyzer(LanguageAnalyzer):
     """TypeScript语言分析器"""
 
+    _EXTENSIONS = frozenset({'.ts', '.tsx'})
+
     @property
     def language_name(self) -> str:
         return "typescript"
@@ -31,19 +58,16 @@ class TypeScriptAnalyzer(LanguageAnalyzer):
 
     def can_analyze(self, file_path: Path) -> bool:
         """检查是否可以分析此文件"""
-        if not file_path.exists() or not file_path.is_file():
+        # 先检查扩展名，再用一次stat同时判断存在性、文件类型与大小
+        if file_path.suffix.lower() not in self._EXTENSIONS:
             return False
 
-        # 检查文件大小
         try:
-            file_size = file_path.stat().st_size
-            if file_size > 10 * 1024 * 1024:  # 10MB
-                return False
+            file_stat = file_path.stat()
         except OSError:
             return False
 
-        # 检查文件扩展名
-        return file_path.suffix.lower() in ['.ts', '.tsx']
+        return stat.S_ISREG(file_stat.st_mode) and file_stat.st_size <= 10 * 1024 * 1024  # 10MB
 
     def analyze(self, file_path: Path) -> Dict[str, Any]:
         """分析TypeScript文件复杂度"""
@@ -77,114 +101,148 @@ def analyze_typescript_complexity_detailed(file_path: Path) -> Dict[str, Any]:
     }
 
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
+        # 大文件经内存映射读取后整体解码，再按换行切分
+        raw = read_source_bytes(file_path)
+        source = decode_source(raw)
+        lines = split_lines(source)
+        offsets = newline_offsets(source)
 
         result['lines'] = len(lines)
-        in_multiline_comment = False
-        current_nested_level = 0
-        current_class = None
-        current_function = None
 
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
+        # 行分类：空行、单行注释、块注释（NumPy可用时大文件向量化分类），后续只统计代码行上的匹配
+        line_kinds = classify_lines(lines, ('//', '/*', '*'), raw)
+        if '*/' in source or '/*' in source:
+            mark_block_comment_lines(line_kinds, source)
 
-            # 跳过空行
-            if not line:
-                result['blank_lines'] += 1
-                continue
-
-            # 处理多行注释
-            if '/*' in line and '*/' not in line:
-                in_multiline_comment = True
-                result['comment_lines'] += 1
-                continue
-            elif '*/' in line:
-                in_multiline_comment = False
-                result['comment_lines'] += 1
+        # 统计嵌套级别：按出现顺序处理注释与字符串之外的每个花括号，记录每个括号的位置及处理后的级别
+        current_nested_level = 0
+        max_nested_level = 0
+        brace_positions = []
+        brace_levels = []
+        for match in (BRACE_TOKEN_PATTERN.finditer(source) if '{' in source else ()):
+            position = match.start()
+            char = source[position]
+            if char == '{':
+                current_nested_level += 1
+                if current_nested_level > max_nested_level:
+                    max_nested_level = current_nested_level
+            elif char == '}':
+                if current_nested_level > 0:
+                    current_nested_level -= 1
+            else:
                 continue
-            elif in_multiline_comment:
-                result['comment_lines'] += 1
+            brace_positions.append(position)
+            brace_levels.append(current_nested_level)
+
+        # 整文件一次性正则扫描，通过换行偏移表二分定位行号；
+        # 源码中不含对应关键字时跳过整段扫描（小文件常见）
+        # 检测imports
+        imports = 0
+        for match in (_IMPORT_PATTERN.finditer(source) if 'import' in source else ()):
+            if line_kinds[line_number_at(offsets, match.start())] == LINE_CODE:
+                imports += 1
+
+        # 检测exports
+        exports = 0
+        for match in (_EXPORT_PATTERN.finditer(source) if 'export' in source else ()):
+            if line_kinds[line_number_at(offsets, match.start())] == LINE_CODE:
+                exports += 1
+
+        # 检测类型定义
+        types = 0
+        for line_num, _ in iter_first_match_lines(_TYPE_PATTERN, source, offsets):
+            if line_kinds[line_num] == LINE_CODE:
+                types += 1
+
+        # 统计接口、类与函数：一次扫描全部声明，每行每种声明只取首个匹配；
+        # 按字段收集到并列列表，扫描结束后再一次性生成明细字典
+        function_columns = ([], [])
+        declarations = {
+            'interface': ([], []),
+            'class': ([], []),
+            'function': function_columns,
+            'const': function_columns
+        }
+        for match in _DECLARATION_PATTERN.finditer(source):
+            line_num = line_number_at(offsets, match.start())
+            if line_kinds[line_num] != LINE_CODE:
                 continue
 
-            # 单行注释
-            if line.startswith('//') or line.startswith('/*') or line.startswith('*'):
-                result['comment_lines'] += 1
+            kind = match.lastgroup
+            kind_lines, kind_names = declarations[kind]
+            if not kind_lines or kind_lines[-1] != line_num:
+                kind_lines.append(line_num)
+                kind_names.append(match.group(kind))
+
+        interface_lines, interface_names = declarations['interface']
+
+        # 类的修饰符与嵌套级别
+        class_lines, class_names = declarations['class']
+        class_modifiers = []
+        class_nested_levels = []
+        for line_num in class_lines:
+            line = lines[line_num - 1]
+            modifiers = []
+            if 'export' in line: modifiers.append('export')
+            if 'abstract' in line: modifiers.append('abstract')
+
+            # 类的嵌套级别为所在行行首处的级别
+            line_start = offsets[line_num - 2] + 1 if line_num > 1 else 0
+            brace_index = bisect_left(brace_positions, line_start) - 1
+            class_modifiers.append(modifiers)
+            class_nested_levels.append(brace_levels[brace_index] if brace_index >= 0 else 0)
+
+        # 函数所属类为当前行及之前最近定义的类
+        function_lines, function_names = declarations['function']
+        function_classes = []
+        for line_num in function_lines:
+            class_index = bisect_right(class_lines, line_num) - 1
+            function_classes.append(class_names[class_index] if class_index >= 0 else None)
+
+        # 方法（类内的函数），以 if/for 开头的行不计入
+        method_lines = []
+        method_names = []
+        method_classes = []
+        for line_num, match in (iter_first_match_lines(_METHOD_PATTERN, source, offsets) if class_lines else ()):
+            if line_kinds[line_num] != LINE_CODE:
                 continue
 
-            # 统计代码行
-            result['code_lines'] += 1
-
-            # 检测imports
-            if line.startswith('import '):
-                result['imports'] += 1
-
-            # 检测exports
-            if line.startswith('export '):
-                result['exports'] += 1
-
-            # 检测类型定义
-            if 'type ' in line or 'interface ' in line:
-                result['types'] += 1
-
-            # 统计接口
-            interface_match = re.search(r'\binterface\s+(\w+)', line)
-            if interface_match:
-                result['interfaces'] += 1
-                interface_name = interface_match.group(1)
-                result['interface_details'].append({
-                    'name': interface_name,
-                    'line': line_num,
-                    'type': 'interface'
-                })
-
-            # 统计类
-            class_match = re.search(r'\b(export\s+)?(abstract\s+)?class\s+(\w+)', line)
-            if class_match:
-                result['classes'] += 1
-                class_name = class_match.group(3)
-                modifiers = []
-                if 'export' in line: modifiers.append('export')
-                if 'abstract' in line: modifiers.append('abstract')
-
-                current_class = {
-                    'name': class_name,
-                    'modifiers': modifiers,
-                    'line': line_num,
-                    'nested_level': current_nested_level
-                }
-                result['class_details'].append(current_class)
-
-            # 统计函数
-            function_match = re.search(r'\b(export\s+)?(function|const)\s+(\w+)', line)
-            if function_match:
-                result['functions'] += 1
-                function_name = function_match.group(3)
-                result['function_details'].append({
-                    'name': function_name,
-                    'line': line_num,
-                    'type': 'function',
-                    'class': current_class['name'] if current_class else None
-                })
-
-            # 统计方法（类内的函数）
-            method_match = re.search(r'\b(\w+)\s*\([^)]*\)\s*[:{=]', line)
-            if current_class and method_match and not line.startswith('if') and not line.startswith('for'):
-                result['methods'] += 1
-                method_name = method_match.group(1)
-                result['method_details'].append({
-                    'name': method_name,
-                    'line': line_num,
-                    'type': 'method',
-                    'class': current_class['name']
-                })
-
-            # 统计嵌套级别
-            if '{' in line:
-                current_nested_level += 1
-                result['max_nested_level'] = max(result['max_nested_level'], current_nested_level)
-            if '}' in line:
-                current_nested_level = max(0, current_nested_level - 1)
+            class_index = bisect_right(class_lines, line_num) - 1
+            if class_index >= 0 and not lines[line_num - 1].lstrip().startswith(('if', 'for')):
+                method_lines.append(line_num)
+                method_names.append(match.group(1))
+                method_classes.append(class_names[class_index])
+
+        result.update({
+            'blank_lines': line_kinds.count(LINE_BLANK, 1),
+            'comment_lines': line_kinds.count(LINE_COMMENT, 1),
+            'code_lines': line_kinds.count(LINE_CODE, 1),
+            'max_nested_level': max_nested_level,
+            'imports': imports,
+            'exports': exports,
+            'types': types,
+            'interfaces': len(interface_lines),
+            'classes': len(class_lines),
+        })
+        result['interface_details'] = [
+            {'name': name, 'line': line_num, 'type': 'interface'}
+            for name, line_num in zip(interface_names, interface_lines)
+        ]
+        result['class_details'] = [
+            {'name': name, 'modifiers': modifiers, 'line': line_num, 'nested_level': nested_level}
+            for name, modifiers, line_num, nested_level
+            in zip(class_names, class_modifiers, class_lines, class_nested_levels)
+        ]
+        result['functions'] = len(function_lines)
+        result['function_details'] = [
+            {'name': name, 'line': line_num, 'type': 'function', 'class': class_name}
+            for name, line_num, class_name in zip(function_names, function_lines, function_classes)
+        ]
+        result['methods'] = len(method_lines)
+        result['method_details'] = [
+            {'name': name, 'line': line_num, 'type': 'method', 'class': class_name}
+            for name, line_num, class_name in zip(method_names, method_lines, method_classes)
+        ]
 
         # 计算复杂度
         result['complexity'] = _calculate_typescript_complexity(result)
@@ -202,6 +260,10 @@ def analyze_typescript_complexity_detailed(file_path: Path) -> Dict[str, Any]:
     return result
 
 
+# 复杂度分析结果缓存（共享对象，调用方只读）
+_lookup_complexity = stat_keyed_cache(analyze_typescript_complexity_detailed)
+
+
 def _calculate_typescript_complexity(analysis_result: Dict[str, Any]) -> int:
     """计算TypeScript代码复杂度"""
     complexity = 1  # 基础复杂度
@@ -259,10 +321,11 @@ def _detect_typescript_code_smells(analysis_result: Dict[str, Any]) -> List[str]
 
 def analyze_typescript_architecture(file_path: Path) -> Dict[str, Any]:
     """分析TypeScript代码架构"""
-    complexity_result = analyze_typescript_complexity_detailed(file_path)
+    # 复杂度结果取自缓存，重复分析未修改的文件时不再重新读取与解析
+    complexity_result = _lookup_complexity(file_path)
 
     if 'error' in complexity_result:
-        return complexity_result
+        return copy.deepcopy(complexity_result)
 
     architecture_result = {
         'file_path': str(file_path),
@@ -5,18 +5,92 @@ Vue代码复杂度分析器
 专门分析Vue代码的复杂度、结构和质量指标
 """
 
+import copy
 import re
+import stat
+from bisect import bisect_left
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Match
 import logging
 from ..language_analyzer_manager import LanguageAnalyzer
+from ..source_utils import (
+    read_source_bytes, decode_source, split_lines, classify_lines, find_block_end, stat_keyed_cache,
+    LINE_BLANK, LINE_COMMENT
+)
+
+# RE2为可选依赖，安装后区块切分使用线性时间匹配
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    re2 = None
+    RE2_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 
+def _compile_section_pattern(tag: str):
+    """
+    编译区块切分模式，第1组为区块内容
+
+    区块缺少结束标签时，回溯引擎会从每个开始标签重新扫描到文件末尾（嵌套的 <template> 较多时耗时成倍增加），
+    安装RE2时改用线性时间匹配；区块切分每个文件只匹配一次，RE2转换文本编码的开销可以忽略
+    """
+    pattern = r'<%s[^>]*>(.*?)</%s>' % (tag, tag)
+    if RE2_AVAILABLE:
+        return re2.compile('(?is)' + pattern)
+    return re.compile(pattern, re.DOTALL | re.IGNORECASE)
+
+
+# 预编译的Vue模式
+_TEMPLATE_PATTERN = _compile_section_pattern('template')
+_SCRIPT_PATTERN = _compile_section_pattern('script')
+_STYLE_PATTERN = _compile_section_pattern('style')
+_TAG_PATTERN = re.compile(r'<(\w+)[^>]*>')
+_EVENT_PATTERN = re.compile(r'@(\w+)=')
+_PROP_PATTERN = re.compile(r':(\w+)=')
+# 脚本区块：计算属性、监听器、方法与组件注册合并为一个交替模式，第1组为区块名
+_SECTION_NAMES = ('computed', 'watch', 'methods', 'components')
+_SECTION_PATTERN = re.compile(r'(%s)\s*:\s*{' % '|'.join(_SECTION_NAMES))
+_FUNCTION_NAME_PATTERN = re.compile(r'(\w+)\s*\([^)]*\)\s*{')
+_KEY_PATTERN = re.compile(r'(\w+)\s*:')
+# 非空行：从行内首个非空白字符匹配到行尾，每个非空行恰好匹配一次
+_NON_BLANK_LINE_PATTERN = re.compile(r'\S[^\n]*')
+# 模板标签扫描：HTML注释整体匹配后跳过，标签属性中引号内的 > 不结束标签；
+# 两个分支都以 < 开头，正则引擎可直接跳到下一个 < 再尝试匹配
+_TEMPLATE_TAG_PATTERN = re.compile(r'''<!--.*?(?:-->|\Z)|<(/?)([A-Za-z][\w-]*)(?:[^'">]|"[^"]*"|'[^']*')*>''', re.DOTALL)
+# 代码异味规则：(指标, 阈值, 提示)，指标超过阈值时给出提示
+_CODE_SMELL_RULES = (
+    ('components', 15, "组件数量过多，可能存在职责分散问题"),
+    ('methods', 20, "方法数量过多，可能存在职责分散问题"),
+    ('computed', 10, "计算属性数量过多，可能存在过度计算问题"),
+    ('watchers', 8, "监听器数量过多，可能存在性能问题"),
+    ('events', 15, "事件数量过多，可能存在过度绑定问题"),
+    ('props', 20, "属性数量过多，可能存在接口复杂问题"),
+    ('max_nested_level', 5, "嵌套级别过深，可能存在可读性问题"),
+    ('template_lines', 80, "模板行数过多，可能存在可读性问题"),
+)
+
+# 架构分级：指标不超过第i个上限时取第i级，超过全部上限时取最后一级
+_ARCHITECTURE_TYPE_LIMITS = (0, 5, 12)
+_ARCHITECTURE_TYPES = ('single_file', 'simple_component', 'moderate_component', 'complex_component')
+_COUPLING_LEVEL_LIMITS = (5, 12)
+_COUPLING_LEVELS = ('low', 'medium', 'high')
+_COHESION_LEVEL_LIMITS = (8, 20)
+_COHESION_LEVELS = ('high', 'medium', 'low')
+
+# HTML空元素没有结束标签，不增加嵌套级别
+_VOID_ELEMENTS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+})
+
+
 class VueAnalyzer(LanguageAnalyzer):
     """Vue语言分析器"""
 
+    _EXTENSIONS = frozenset({'.vue'})
+
     @property
     def language_name(self) -> str:
         return "vue"
@@ -31,19 +105,16 @@ class VueAnalyzer(LanguageAnalyzer):
 
     def can_analyze(self, file_path: Path) -> bool:
         """检查是否可以分析此文件"""
-        if not file_path.exists() or not file_path.is_file():
+        # 先检查扩展名，再用一次stat同时判断存在性、文件类型与大小
+        if file_path.suffix.lower() not in self._EXTENSIONS:
             return False
 
-        # 检查文件大小
         try:
-            file_size = file_path.stat().st_size
-            if file_size > 10 * 1024 * 1024:  # 10MB
-                return False
+            file_stat = file_path.stat()
         except OSError:
             return False
 
-        # 检查文件扩展名
-        return file_path.suffix.lower() == '.vue'
+        return stat.S_ISREG(file_stat.st_mode) and file_stat.st_size <= 10 * 1024 * 1024  # 10MB
 
     def analyze(self, file_path: Path) -> Dict[str, Any]:
         """分析Vue文件复杂度"""
@@ -81,54 +152,68 @@ def analyze_vue_complexity_detailed(file_path: Path) -> Dict[str, Any]:
     }
 
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+        raw = read_source_bytes(file_path)
+        content = decode_source(raw)
 
-        lines = content.split('\n')
-        result['lines'] = len(lines)
+        # 行数直接由换行符计数得到
+        result['lines'] = content.count('\n') + 1
 
         # 分离Vue文件的三个部分
-        template_match = re.search(r'<template[^>]*>(.*?)</template>', content, re.DOTALL | re.IGNORECASE)
-        script_match = re.search(r'<script[^>]*>(.*?)</script>', content, re.DOTALL | re.IGNORECASE)
-        style_match = re.search(r'<style[^>]*>(.*?)</style>', content, re.DOTALL | re.IGNORECASE)
+        template_match = _TEMPLATE_PATTERN.search(content)
+        script_match = _SCRIPT_PATTERN.search(content)
+        style_match = _STYLE_PATTERN.search(content)
 
-        # 分析模板部分
+        # 分析模板部分（各模式直接在原文的区块范围内匹配，不复制区块内容）
         if template_match:
-            template_content = template_match.group(1)
-            template_lines = template_content.split('\n')
-            result['template_lines'] = len([line for line in template_lines if line.strip()])
+            template_start, template_end = template_match.span(1)
+            result['template_lines'] = _count_non_blank_lines(content, template_match)
 
             # 统计组件使用
-            component_matches = re.findall(r'<(\w+)[^>]*>', template_content)
+            component_matches = _TAG_PATTERN.findall(content, template_start, template_end)
             result['components'] = len(set(component_matches))
 
             # 统计事件绑定
-            event_matches = re.findall(r'@(\w+)=', template_content)
+            event_matches = _EVENT_PATTERN.findall(content, template_start, template_end)
             result['events'] = len(event_matches)
 
             # 统计属性绑定
-            prop_matches = re.findall(r':(\w+)=', template_content)
+            prop_matches = _PROP_PATTERN.findall(content, template_start, template_end)
             result['props'] = len(prop_matches)
 
-            # 计算模板嵌套级别
-            template_nesting = 0
-            for char in template_content:
-                if char == '<' and not template_content.startswith('</', template_content.find(char)):
+            # 计算模板嵌套级别：开始标签加一、结束标签减一，自闭合标签与空元素不影响嵌套
+            template_nesting = max_nested_level = 0
+            for match in _TEMPLATE_TAG_PATTERN.finditer(content, template_start, template_end):
+                closing, tag = match.groups()
+                if tag is None:
+                    continue
+                if closing:
+                    if template_nesting > 0:
+                        template_nesting -= 1
+                elif content[match.end() - 2] != '/' and tag.lower() not in _VOID_ELEMENTS:
                     template_nesting += 1
-                elif char == '>':
-                    template_nesting = max(0, template_nesting - 1)
-                result['max_nested_level'] = max(result['max_nested_level'], template_nesting)
+                    if template_nesting > max_nested_level:
+                        max_nested_level = template_nesting
+            result['max_nested_level'] = max_nested_level
 
         # 分析脚本部分
         if script_match:
-            script_content = script_match.group(1)
-            script_lines = script_content.split('\n')
-            result['script_lines'] = len([line for line in script_lines if line.strip()])
+            script_start, script_end = script_match.span(1)
+            result['script_lines'] = _count_non_blank_lines(content, script_match)
+
+            # 一次扫描脚本，定位计算属性、监听器、方法与组件注册区块（各取首次出现），
+            # 区块范围按花括号配对确定（跳过注释与字符串字面量），内部嵌套的对象和函数体不会截断区块
+            sections = {}
+            for match in _SECTION_PATTERN.finditer(content, script_start, script_end):
+                kind = match.group(1)
+                if kind not in sections:
+                    block_end = min(find_block_end(content, match.end() - 1), script_end)
+                    sections[kind] = (match.end(), block_end)
+                    if len(sections) == len(_SECTION_NAMES):
+                        break
 
             # 统计计算属性
-            computed_matches = re.findall(r'computed\s*:\s*{([^}]+)}', script_content, re.DOTALL)
-            if computed_matches:
-                computed_props = re.findall(r'(\w+)\s*\([^)]*\)\s*{', computed_matches[0])
+            if 'computed' in sections:
+                computed_props = _find_member_functions(content, *sections['computed'])
                 result['computed'] = len(computed_props)
                 for prop in computed_props:
                     result['computed_details'].append({
@@ -137,9 +222,8 @@ def analyze_vue_complexity_detailed(file_path: Path) -> Dict[str, Any]:
                     })
 
             # 统计监听器
-            watch_matches = re.findall(r'watch\s*:\s*{([^}]+)}', script_content, re.DOTALL)
-            if watch_matches:
-                watch_props = re.findall(r'(\w+)\s*\([^)]*\)\s*{', watch_matches[0])
+            if 'watch' in sections:
+                watch_props = _find_member_functions(content, *sections['watch'])
                 result['watchers'] = len(watch_props)
                 for prop in watch_props:
                     result['watcher_details'].append({
@@ -148,9 +232,8 @@ def analyze_vue_complexity_detailed(file_path: Path) -> Dict[str, Any]:
                     })
 
             # 统计方法
-            method_matches = re.findall(r'methods\s*:\s*{([^}]+)}', script_content, re.DOTALL)
-            if method_matches:
-                method_names = re.findall(r'(\w+)\s*\([^)]*\)\s*{', method_matches[0])
+            if 'methods' in sections:
+                method_names = _find_member_functions(content, *sections['methods'])
                 result['methods'] = len(method_names)
                 for name in method_names:
                     result['method_details'].append({
@@ -159,9 +242,8 @@ def analyze_vue_complexity_detailed(file_path: Path) -> Dict[str, Any]:
                     })
 
             # 统计组件注册
-            component_matches = re.findall(r'components\s*:\s*{([^}]+)}', script_content, re.DOTALL)
-            if component_matches:
-                component_names = re.findall(r'(\w+)\s*:', component_matches[0])
+            if 'components' in sections:
+                component_names = _KEY_PATTERN.findall(content, *sections['components'])
                 for name in component_names:
                     result['component_details'].append({
                         'name': name,
@@ -170,17 +252,13 @@ def analyze_vue_complexity_detailed(file_path: Path) -> Dict[str, Any]:
 
         # 分析样式部分
         if style_match:
-            style_content = style_match.group(1)
-            style_lines = style_content.split('\n')
-            result['style_lines'] = len([line for line in style_lines if line.strip()])
-
-        # 统计注释和空行
-        for line in lines:
-            line = line.strip()
-            if not line:
-                result['blank_lines'] += 1
-            elif line.startswith('<!--') or line.startswith('//') or line.startswith('/*'):
-                result['comment_lines'] += 1
+            result['style_lines'] = _count_non_blank_lines(content, style_match)
+
+        # 统计注释和空行（以换行结尾时最后的空串同样计为一个空行）
+        lines = split_lines(content)
+        line_kinds = classify_lines(lines, ('<!--', '//', '/*'), raw)
+        result['blank_lines'] = line_kinds.count(LINE_BLANK, 1) + result['lines'] - len(lines)
+        result['comment_lines'] = line_kinds.count(LINE_COMMENT, 1)
 
         result['code_lines'] = result['lines'] - result['blank_lines'] - result['comment_lines']
 
@@ -197,6 +275,27 @@ def analyze_vue_complexity_detailed(file_path: Path) -> Dict[str, Any]:
     return result
 
 
+# 复杂度分析结果缓存（共享对象，调用方只读）
+_lookup_complexity = stat_keyed_cache(analyze_vue_complexity_detailed)
+
+
+def _count_non_blank_lines(content: str, section_match: Match) -> int:
+    """统计区块内容（匹配的第1组）中的非空行数，直接在原文的区块范围内匹配，不切分区块"""
+    return len(_NON_BLANK_LINE_PATTERN.findall(content, section_match.start(1), section_match.end(1)))
+
+
+def _find_member_functions(text: str, start: int, end: int) -> List[str]:
+    """查找区块 [start, end) 内的顶层函数成员名，匹配到成员后跳过其函数体，函数体内的语句不计入"""
+    names = []
+    position = start
+    while True:
+        match = _FUNCTION_NAME_PATTERN.search(text, position, end)
+        if match is None:
+            return names
+        names.append(match.group(1))
+        position = find_block_end(text, match.end() - 1) + 1
+
+
 def _calculate_vue_complexity(analysis_result: Dict[str, Any]) -> int:
     """计算Vue代码复杂度"""
     complexity = 1  # 基础复杂度
@@ -226,50 +325,17 @@ def _calculate_vue_complexity(analysis_result: Dict[str, Any]) -> int:
 
 
 def _detect_vue_code_smells(analysis_result: Dict[str, Any]) -> List[str]:
-    """检测Vue代码异味"""
-    smells = []
-
-    # 检查组件数量过多
-    if analysis_result['components'] > 15:
-        smells.append("组件数量过多，可能存在职责分散问题")
-
-    # 检查方法数量过多
-    if analysis_result['methods'] > 20:
-        smells.append("方法数量过多，可能存在职责分散问题")
-
-    # 检查计算属性数量过多
-    if analysis_result['computed'] > 10:
-        smells.append("计算属性数量过多，可能存在过度计算问题")
-
-    # 检查监听器数量过多
-    if analysis_result['watchers'] > 8:
-        smells.append("监听器数量过多，可能存在性能问题")
-
-    # 检查事件数量过多
-    if analysis_result['events'] > 15:
-        smells.append("事件数量过多，可能存在过度绑定问题")
-
-    # 检查属性数量过多
-    if analysis_result['props'] > 20:
-        smells.append("属性数量过多，可能存在接口复杂问题")
-
-    # 检查嵌套级别过深
-    if analysis_result['max_nested_level'] > 5:
-        smells.append("嵌套级别过深，可能存在可读性问题")
-
-    # 检查模板行数过多
-    if analysis_result['template_lines'] > 80:
-        smells.append("模板行数过多，可能存在可读性问题")
-
-    return smells
+    """检测Vue代码异味：按规则表逐项比较指标与阈值"""
+    return [message for key, threshold, message in _CODE_SMELL_RULES if analysis_result[key] > threshold]
 
 
 def analyze_vue_architecture(file_path: Path) -> Dict[str, Any]:
     """分析Vue代码架构"""
-    complexity_result = analyze_vue_complexity_detailed(file_path)
+    # 复杂度结果取自缓存，重复分析未修改的文件时不再重新读取与解析
+    complexity_result = _lookup_complexity(file_path)
 
     if 'error' in complexity_result:
-        return complexity_result
+        return copy.deepcopy(complexity_result)
 
     architecture_result = {
         'file_path': str(file_path),
@@ -282,14 +348,8 @@ def analyze_vue_architecture(file_path: Path) -> Dict[str, Any]:
     }
 
     # 分析架构类型
-    if complexity_result['components'] == 0:
-        architecture_result['architecture_type'] = 'single_file'
-    elif complexity_result['components'] <= 5:
-        architecture_result['architecture_type'] = 'simple_component'
-    elif complexity_result['components'] <= 12:
-        architecture_result['architecture_type'] = 'moderate_component'
-    else:
-        architecture_result['architecture_type'] = 'complex_component'
+    architecture_result['architecture_type'] = _ARCHITECTURE_TYPES[
+        bisect_left(_ARCHITECTURE_TYPE_LIMITS, complexity_result['components'])]
 
     # 分析组件模式
     if complexity_result['methods'] > 15 and complexity_result['computed'] > 5:
@@ -308,21 +368,13 @@ def analyze_vue_architecture(file_path: Path) -> Dict[str, Any]:
         architecture_result['state_management'] = 'moderate_local'
 
     # 分析耦合度
-    if complexity_result['props'] <= 5:
-        architecture_result['coupling_level'] = 'low'
-    elif complexity_result['props'] <= 12:
-        architecture_result['coupling_level'] = 'medium'
-    else:
-        architecture_result['coupling_level'] = 'high'
+    architecture_result['coupling_level'] = _COUPLING_LEVELS[
+        bisect_left(_COUPLING_LEVEL_LIMITS, complexity_result['props'])]
 
     # 分析内聚度
     total_methods = complexity_result['methods'] + complexity_result['computed'] + complexity_result['watchers']
-    if total_methods <= 8:
-        architecture_result['cohesion_level'] = 'high'
-    elif total_methods <= 20:
-        architecture_result['cohesion_level'] = 'medium'
-    else:
-        architecture_result['cohesion_level'] = 'low'
+    architecture_result['cohesion_level'] = _COHESION_LEVELS[
+        bisect_left(_COHESION_LEVEL_LIMITS, total_methods)]
 
     # 生成建议
     if architecture_result['coupling_level'] == 'high':
@@ -349,23 +401,24 @@ def analyze_vue_accessibility(file_path: Path) -> Dict[str, Any]:
     }
 
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        # 检测的关键字均为ASCII，直接在原始字节上查找，不必解码
+        with open(file_path, 'rb') as f:
             content = f.read()
 
         # 检测可访问性问题
-        if 'v-for' in content and 'key' not in content:
+        if b'v-for' in content and b'key' not in content:
             result['accessibility_issues'].append('缺少key属性')
             result['accessibility_score'] -= 10
 
-        if 'v-if' in content and 'v-else' not in content:
+        if b'v-if' in content and b'v-else' not in content:
             result['accessibility_issues'].append('条件渲染不完整')
             result['accessibility_score'] -= 5
 
-        if 'alt=' not in content and 'img' in content:
+        if b'alt=' not in content and b'img' in content:
             result['accessibility_issues'].append('图片缺少alt属性')
             result['accessibility_score'] -= 15
 
-        if 'aria-' not in content and 'role=' not in content:
+        if b'aria-' not in content and b'role=' not in content:
             result['accessibility_issues'].append('缺少ARIA属性')
             result['accessibility_score'] -= 10
 
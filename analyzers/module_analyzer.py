@@ -5,21 +5,38 @@
 包含模块扫描、复杂度分析等功能
 """
 
+import importlib
 import os
 import re
 import logging
+from concurrent.futures import Executor
+from functools import lru_cache, partial
+from itertools import repeat
 from pathlib import Path
+from types import MappingProxyType
 from collections import defaultdict, Counter
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Callable, Dict, Any, Iterator, List, Tuple, Optional, Pattern, Mapping
 from .complexity_analyzer import (
     analyze_code_complexity
 )
+from .source_utils import iter_dir_entries
 
 logger = logging.getLogger(__name__)
 
+# 待分析文件数与总字节数均不低于以下阈值时才使用进程池，工作量较小时进程间序列化的开销超过并行收益
+_PARALLEL_MIN_FILES = 16
+_PARALLEL_MIN_BYTES = 1024 * 1024
 
-def analyze_module(module_path: Path, ignore_patterns: List[str] = None) -> Dict[str, Any]:
-    """分析模块"""
+# 通用文件分块读取的字符数
+_READ_CHUNK_CHARS = 64 * 1024
+
+# 后备方案按扩展名缓存的语言分析函数（None表示没有可用的分析函数，直接使用通用分析）
+_FALLBACK_ANALYZE_FUNCTIONS: Dict[str, Optional[Callable[[Path], Dict[str, Any]]]] = {}
+
+
+def analyze_module(module_path: Path, ignore_patterns: List[str] = None,
+                   process_pool: Optional[Executor] = None) -> Dict[str, Any]:
+    """分析模块（process_pool 为调用方持有的进程池，传入时工作量较大的模块分发到其中分析）"""
     result = {
         'module_name': module_path.name,
         'module_path': str(module_path),
@@ -31,8 +48,9 @@ def analyze_module(module_path: Path, ignore_patterns: List[str] = None) -> Dict
     }
 
     try:
-        # 判断模块类型
-        if (module_path / 'pom.xml').exists():
+        # 判断模块类型（标记文件直接按字符串路径探测，不为每个候选文件创建Path对象）
+        module_dir = os.fspath(module_path)
+        if os.path.exists(os.path.join(module_dir, 'pom.xml')):
             result['type'] = 'Java/Maven项目'
             # 分析Maven项目结构
             try:
@@ -41,9 +59,9 @@ def analyze_module(module_path: Path, ignore_patterns: List[str] = None) -> Dict
             except Exception as e:
                 logger.warning(f"分析Maven项目结构失败: {e}")
                 result['project_structure'] = {'error': f'分析失败: {str(e)}'}
-        elif (module_path / 'build.gradle').exists():
+        elif os.path.exists(os.path.join(module_dir, 'build.gradle')):
             result['type'] = 'Java/Gradle项目'
-        elif (module_path / 'package.json').exists():
+        elif os.path.exists(os.path.join(module_dir, 'package.json')):
             # 分析Node.js项目结构
             try:
                 from .project_structure_analyzer import analyze_package_json
@@ -63,14 +81,15 @@ def analyze_module(module_path: Path, ignore_patterns: List[str] = None) -> Dict
             except Exception as e:
                 logger.warning(f"分析Package.json失败: {e}")
                 result['project_structure'] = {'error': f'分析失败: {str(e)}'}
-        elif (module_path / 'requirements.txt').exists() or (module_path / 'setup.py').exists():
+        elif (os.path.exists(os.path.join(module_dir, 'requirements.txt'))
+              or os.path.exists(os.path.join(module_dir, 'setup.py'))):
             result['type'] = 'Python项目'
 
         # 统计文件
         result['files'] = count_files_by_type(module_path, ignore_patterns)
 
         # 分析复杂度
-        result['complexity'] = analyze_module_complexity(module_path, ignore_patterns)
+        result['complexity'] = analyze_module_complexity(module_path, ignore_patterns, process_pool=process_pool)
 
         # 统计信息
         result['stats'] = {
@@ -85,21 +104,26 @@ def analyze_module(module_path: Path, ignore_patterns: List[str] = None) -> Dict
     return result
 
 
-def analyze_file_complexity(file_path: Path, max_file_size: int = None) -> Dict[str, Any]:
+def analyze_file_complexity(file_path: Path, max_file_size: int = None,
+                            file_stat: Optional[os.stat_result] = None) -> Dict[str, Any]:
     """
     分析单个文件的复杂度
 
     Args:
         file_path: 文件路径
         max_file_size: 最大文件大小（字节），如果为None则使用配置值
+        file_stat: 预先获取的文件状态（如遍历目录时的目录项状态），为None时在此获取
 
     Returns:
         文件分析结果字典
     """
     try:
-        # 检查文件是否存在
-        if not file_path.exists():
-            return _create_error_result(file_path, "文件不存在")
+        # 获取文件状态，同时检查文件是否存在
+        if file_stat is None:
+            try:
+                file_stat = file_path.stat()
+            except FileNotFoundError:
+                return _create_error_result(file_path, "文件不存在")
 
         # 如果没有传入max_file_size，尝试从配置获取
         if max_file_size is None:
@@ -111,7 +135,7 @@ def analyze_file_complexity(file_path: Path, max_file_size: int = None) -> Dict[
                 max_file_size = 10 * 1024 * 1024  # 默认10MB作为后备
 
         # 检查文件大小
-        file_size = file_path.stat().st_size
+        file_size = file_stat.st_size
         if file_size > max_file_size:
             logger.warning(f"文件过大，跳过分析: {file_path} ({file_size / 1024 / 1024:.1f}MB)")
             return _create_error_result(file_path, f"文件过大，跳过分析 (超过{max_file_size / 1024 / 1024:.1f}MB)")
@@ -159,14 +183,86 @@ def _create_error_result(file_path: Path, error_message: str) -> Dict[str, Any]:
     }
 
 
+def _compile_ignore_pattern(ignore_patterns: List[str]) -> Optional[Pattern]:
+    """将忽略模式（路径子串）合并为一个交替正则，每个路径只需匹配一次；没有忽略模式时返回None"""
+    if not ignore_patterns:
+        return None
+    return re.compile('|'.join(map(re.escape, ignore_patterns)))
+
+
+def _iter_module_files(module_path: Path, ignore_pattern: Optional[Pattern]) -> Iterator[os.DirEntry]:
+    """
+    递归遍历模块目录，按 Path.rglob('*') 的顺序产出未被忽略的文件目录项
+
+    调用方需要文件状态时可直接使用目录项缓存的 stat()。
+    忽略模式按路径子串匹配，目录路径命中时其下所有文件路径必然同样命中，因此整个目录直接剪枝
+    """
+    root = str(module_path)
+    if ignore_pattern and ignore_pattern.search(root):
+        return
+
+    prune = (lambda entry: ignore_pattern.search(entry.path)) if ignore_pattern else None
+    for entry in iter_dir_entries(root, prune):
+        try:
+            if entry.is_dir(follow_symlinks=False) or not entry.is_file():
+                continue
+        except OSError:
+            continue
+        if ignore_pattern and ignore_pattern.search(entry.path):
+            continue
+        yield entry
+
+
+def _analyze_files(files: List[Path], file_stats: List[Optional[os.stat_result]],
+                   process_pool: Optional[Executor] = None) -> Iterator[Dict[str, Any]]:
+    """
+    逐个产出文件列表的复杂度分析结果，顺序与文件列表一致，调用方可边分析边汇总
+
+    file_stats 为与文件列表对应的预取文件状态（None表示由分析时自行获取）。
+
+    传入进程池且文件数、总字节数均不低于 _PARALLEL_MIN_FILES / _PARALLEL_MIN_BYTES 时分发到进程池
+    （正则扫描为CPU密集型，线程受GIL限制无法并行）。进程池由调用方在整次扫描中复用，
+    不为每个模块重新创建；进程池不可用时从尚未产出结果的文件开始回退为串行分析
+    """
+    try:
+        from .analyzer_config import get_config
+        config = get_config()
+        max_file_size = config.max_file_size
+        parallel_processing = config.parallel_processing
+    except ImportError:
+        max_file_size = 10 * 1024 * 1024  # 默认10MB作为后备
+        parallel_processing = {}
+
+    # 文件大小上限在主进程确定后传给工作进程，工作进程不必各自读取配置
+    # 工作量按待分析的字节数估计（超过大小上限的文件直接跳过，不计入）
+    if process_pool is not None and len(files) >= _PARALLEL_MIN_FILES and sum(
+            file_stat.st_size for file_stat in file_stats
+            if file_stat is not None and file_stat.st_size <= max_file_size) >= _PARALLEL_MIN_BYTES:
+        # 按块分发以摊薄进程间序列化开销，块大小不超过配置值，且保证每个工作进程能分到多个块
+        max_workers = max(1, min(parallel_processing.get('max_workers', 1), os.cpu_count() or 1))
+        chunk_size = max(1, min(parallel_processing.get('chunk_size', 100), len(files) // (max_workers * 4)))
+        completed = 0
+        try:
+            for file_result in process_pool.map(analyze_file_complexity, files, repeat(max_file_size),
+                                                file_stats, chunksize=chunk_size):
+                yield file_result
+                completed += 1
+            return
+        except Exception as e:
+            logger.warning(f"进程池分析失败，剩余文件改为串行分析: {e}")
+        files = files[completed:]
+        file_stats = file_stats[completed:]
+
+    for file_path, file_stat in zip(files, file_stats):
+        yield analyze_file_complexity(file_path, max_file_size, file_stat)
+
+
 def _analyze_generic_file(file_path: Path) -> Dict[str, Any]:
     """分析通用文件（只统计行数）"""
     try:
+        # 分块读取并统计换行符，不保留整个文件内容与行列表（行数与 content.split('\n') 一致）
         with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        lines = content.split('\n')
-        total_lines = len(lines)
+            total_lines = sum(chunk.count('\n') for chunk in iter(partial(f.read, _READ_CHUNK_CHARS), '')) + 1
 
         return {
             'total_lines': total_lines,
@@ -181,8 +277,22 @@ def _analyze_generic_file(file_path: Path) -> Dict[str, Any]:
         return _create_error_result(file_path, f"通用分析失败: {str(e)}")
 
 
-def analyze_module_complexity(module_path: Path, ignore_patterns: List[str] = None) -> Dict[str, Any]:
-    """分析模块的复杂度"""
+def analyze_module_complexity(module_path: Path, ignore_patterns: List[str] = None,
+                              retain_per_file: bool = True,
+                              process_pool: Optional[Executor] = None) -> Dict[str, Any]:
+    """
+    分析模块的复杂度
+
+    Args:
+        module_path: 模块路径
+        ignore_patterns: 忽略模式（路径子串），为None时使用默认值
+        retain_per_file: 是否在 file_complexity 中保留每个文件的分析结果；
+            为False时只汇总统计信息，单文件结果汇总后即丢弃，大型代码库的内存占用不随文件数增长
+        process_pool: 调用方持有的进程池，为None时串行分析
+
+    Returns:
+        模块复杂度分析结果
+    """
     result = {
         'module_name': module_path.name,
         'module_path': str(module_path),
@@ -202,8 +312,8 @@ def analyze_module_complexity(module_path: Path, ignore_patterns: List[str] = No
     }
 
     try:
-        # 动态获取语言扩展名映射
-        language_extensions = _get_dynamic_language_extensions()
+        # 动态获取扩展名到语言的映射，每个文件只需一次字典查找
+        file_languages = _get_file_language_mapping()
 
         # 使用传入的忽略模式，如果没有传入则使用默认值
         if ignore_patterns is None:
@@ -211,77 +321,70 @@ def analyze_module_complexity(module_path: Path, ignore_patterns: List[str] = No
                 'node_modules', '.git', 'target', 'dist', 'build',
                 '__pycache__', '.pytest_cache', '.coverage', '.mypy_cache'
             ]
+        ignore_pattern = _compile_ignore_pattern(ignore_patterns)
+
+        # 复杂度分布区间在遍历前读取一次，每个文件分析后直接计入所在区间
+        complexity_ranges = [(range_name, min_val, max_val)
+                             for range_name, (min_val, max_val) in _get_complexity_ranges().items()]
+        complexity_distribution = result['complexity_distribution']
+
+        # 遍历文件，先收集待分析的文件路径、扩展名与目录项缓存的文件状态
+        paths = []
+        extensions = []
+        file_stats = []
+        for entry in _iter_module_files(module_path, ignore_pattern):
+            paths.append(entry.path)
+            extensions.append(os.path.splitext(entry.name)[1].lower())
+            try:
+                file_stats.append(entry.stat())
+            except OSError:
+                file_stats.append(None)
+
+        # 分析文件复杂度，按文件顺序逐个汇总结果
+        analyzed_files = 0
+        file_results = _analyze_files([Path(path) for path in paths], file_stats, process_pool)
+        for path, file_ext, file_result in zip(paths, extensions, file_results):
+            if 'error' not in file_result:
+                analyzed_files += 1
+
+                # 更新统计信息
+                result['total_lines'] += file_result.get('total_lines', 0)
+                result['total_complexity'] += file_result.get('total_complexity', 0)
+
+                # 更新语言统计
+                lang = file_languages.get(file_ext)
+                if lang:
+                    if lang not in result['language_stats']:
+                        result['language_stats'][lang] = {
+                            'files': 0,
+                            'lines': 0,
+                            'complexity': 0
+                        }
+                    result['language_stats'][lang]['files'] += 1
+                    result['language_stats'][lang]['lines'] += file_result.get('total_lines', 0)
+                    result['language_stats'][lang]['complexity'] += file_result.get('total_complexity', 0)
+
+                # 更新最大复杂度
+                file_complexity = file_result.get('total_complexity', 0)
+                if file_complexity > result['max_complexity']:
+                    result['max_complexity'] = file_complexity
+
+                # 计入复杂度分布（区间互不重叠，命中即停止）
+                for range_name, min_val, max_val in complexity_ranges:
+                    if min_val <= file_complexity <= max_val:
+                        complexity_distribution[range_name] += 1
+                        break
 
-        # 遍历文件
-        for file_path in module_path.rglob('*'):
-            if file_path.is_file():
-                # 检查是否应该忽略
-                if any(pattern in str(file_path) for pattern in ignore_patterns):
-                    continue
-
-                # 分析文件复杂度
-                file_result = analyze_file_complexity(file_path)
-
-                if 'error' not in file_result:
-                    # 更新统计信息
-                    result['total_lines'] += file_result.get('total_lines', 0)
-                    result['total_complexity'] += file_result.get('total_complexity', 0)
-
-                    # 更新语言统计
-                    file_ext = file_path.suffix.lower()
-                    for lang, exts in language_extensions.items():
-                        if file_ext in exts:
-                            if lang not in result['language_stats']:
-                                result['language_stats'][lang] = {
-                                    'files': 0,
-                                    'lines': 0,
-                                    'complexity': 0
-                                }
-                            result['language_stats'][lang]['files'] += 1
-                            result['language_stats'][lang]['lines'] += file_result.get('total_lines', 0)
-                            result['language_stats'][lang]['complexity'] += file_result.get('total_complexity', 0)
-                            break
-
-                    # 记录文件复杂度
-                    result['file_complexity'][str(file_path)] = file_result
-
-                    # 更新最大复杂度
-                    file_complexity = file_result.get('total_complexity', 0)
-                    if file_complexity > result['max_complexity']:
-                        result['max_complexity'] = file_complexity
+                # 记录文件复杂度
+                if retain_per_file:
+                    result['file_complexity'][path] = file_result
 
         # 设置总文件数
-        result['total_files'] = len(result['file_complexity'])
+        result['total_files'] = analyzed_files
 
         # 计算平均复杂度
-        if result['file_complexity']:
-            result['average_complexity'] = result['total_complexity'] / len(result['file_complexity'])
-
-        # 复杂度分布 - 从配置读取阈值
-        try:
-            from .analyzer_config import get_config
-            config = get_config()
-            base_thresholds = config.complexity_thresholds
-
-            complexity_ranges = {
-                'LOW': (0, base_thresholds['LOW'] // 10),
-                'MEDIUM': (base_thresholds['LOW'] // 10 + 1, base_thresholds['MEDIUM'] // 10),
-                'HIGH': (base_thresholds['MEDIUM'] // 10 + 1, base_thresholds['HIGH'] // 10),
-                'VERY_HIGH': (base_thresholds['HIGH'] // 10 + 1, float('inf'))
-            }
-        except ImportError:
-            # 如果无法导入配置，使用默认值作为后备
-            complexity_ranges = {
-                'LOW': (0, 10),
-                'MEDIUM': (11, 50),
-                'HIGH': (51, 100),
-                'VERY_HIGH': (101, float('inf'))
-            }
-
-        for range_name, (min_val, max_val) in complexity_ranges.items():
-            count = sum(1 for file_result in result['file_complexity'].values()
-                       if min_val <= file_result.get('total_complexity', 0) <= max_val)
-            result['complexity_distribution'][range_name] = count
+        if analyzed_files:
+            result['average_complexity'] = result['total_complexity'] / analyzed_files
 
     except Exception as e:
         logger.error(f"分析模块复杂度失败 {module_path}: {e}")
@@ -290,13 +393,36 @@ def analyze_module_complexity(module_path: Path, ignore_patterns: List[str] = No
     return result
 
 
+def _get_complexity_ranges() -> Dict[str, Tuple[int, float]]:
+    """获取文件复杂度分布区间 - 从配置读取阈值"""
+    try:
+        from .analyzer_config import get_config
+        config = get_config()
+        base_thresholds = config.complexity_thresholds
+
+        return {
+            'LOW': (0, base_thresholds['LOW'] // 10),
+            'MEDIUM': (base_thresholds['LOW'] // 10 + 1, base_thresholds['MEDIUM'] // 10),
+            'HIGH': (base_thresholds['MEDIUM'] // 10 + 1, base_thresholds['HIGH'] // 10),
+            'VERY_HIGH': (base_thresholds['HIGH'] // 10 + 1, float('inf'))
+        }
+    except ImportError:
+        # 如果无法导入配置，使用默认值作为后备
+        return {
+            'LOW': (0, 10),
+            'MEDIUM': (11, 50),
+            'HIGH': (51, 100),
+            'VERY_HIGH': (101, float('inf'))
+        }
+
+
 def count_files_by_type(module_path: Path, ignore_patterns: List[str] = None) -> Dict[str, int]:
     """统计模块中各种类型的文件数量"""
     file_counts = defaultdict(int)
 
     try:
-        # 动态获取语言扩展名映射
-        language_extensions = _get_dynamic_language_extensions()
+        # 动态获取扩展名到语言的映射，每个文件只需一次字典查找
+        file_languages = _get_file_language_mapping()
 
         # 使用传入的忽略模式，如果没有传入则使用默认值
         if ignore_patterns is None:
@@ -304,26 +430,11 @@ def count_files_by_type(module_path: Path, ignore_patterns: List[str] = None) ->
                 'node_modules', '.git', 'target', 'dist', 'build',
                 '__pycache__', '.pytest_cache', '.coverage', '.mypy_cache'
             ]
+        ignore_pattern = _compile_ignore_pattern(ignore_patterns)
 
-        # 遍历文件
-        for file_path in module_path.rglob('*'):
-            if file_path.is_file():
-                # 检查是否应该忽略
-                if any(pattern in str(file_path) for pattern in ignore_patterns):
-                    continue
-
-                # 统计文件类型
-                file_ext = file_path.suffix.lower()
-                counted = False
-
-                for lang, exts in language_extensions.items():
-                    if file_ext in exts:
-                        file_counts[lang] += 1
-                        counted = True
-                        break
-
-                if not counted:
-                    file_counts['other'] += 1
+        # 遍历文件，统计文件类型
+        for entry in _iter_module_files(module_path, ignore_pattern):
+            file_counts[file_languages.get(os.path.splitext(entry.name)[1].lower(), 'other')] += 1
 
     except Exception as e:
         logger.error(f"统计文件类型失败 {module_path}: {e}")
@@ -344,17 +455,10 @@ def _analyze_file_with_dynamic_analyzer(file_path: Path, file_extension: str) ->
 def _analyze_file_with_fallback(file_path: Path, file_extension: str) -> Dict[str, Any]:
     """后备方案：基于文件扩展名的简单分析"""
     try:
-        # 尝试动态导入对应的分析器
-        analyzer_name = _get_analyzer_name_from_extension(file_extension)
-        if analyzer_name:
-            try:
-                # 动态导入分析器模块
-                module = __import__(f'.language_analyzers.{analyzer_name}_analyzer', fromlist=['analyze_complexity_detailed'])
-                analyze_func = getattr(module, 'analyze_complexity_detailed', None)
-                if analyze_func:
-                    return analyze_func(file_path)
-            except ImportError:
-                pass
+        # 尝试使用对应语言分析器模块的详细分析函数
+        analyze_func = _get_fallback_analyze_function(file_extension)
+        if analyze_func:
+            return analyze_func(file_path)
 
         # 如果动态导入失败，使用通用分析
         return _analyze_generic_file(file_path)
@@ -364,6 +468,30 @@ def _analyze_file_with_fallback(file_path: Path, file_extension: str) -> Dict[st
         return _analyze_generic_file(file_path)
 
 
+def _get_fallback_analyze_function(file_extension: str) -> Optional[Callable[[Path], Dict[str, Any]]]:
+    """
+    根据文件扩展名获取语言分析器模块中的详细分析函数，按扩展名缓存（包括没有可用函数的情况）
+
+    分析函数按 analyze_<语言>_complexity_detailed 命名，兼容通用名 analyze_complexity_detailed
+    """
+    if file_extension in _FALLBACK_ANALYZE_FUNCTIONS:
+        return _FALLBACK_ANALYZE_FUNCTIONS[file_extension]
+
+    analyze_func = None
+    analyzer_name = _get_analyzer_name_from_extension(file_extension)
+    if analyzer_name:
+        try:
+            # 动态导入分析器模块（相对于当前包）
+            module = importlib.import_module(f'.language_analyzers.{analyzer_name}_analyzer', package=__package__)
+            analyze_func = (getattr(module, f'analyze_{analyzer_name}_complexity_detailed', None)
+                            or getattr(module, 'analyze_complexity_detailed', None))
+        except ImportError:
+            pass
+
+    _FALLBACK_ANALYZE_FUNCTIONS[file_extension] = analyze_func
+    return analyze_func
+
+
 def _get_analyzer_name_from_extension(file_extension: str) -> Optional[str]:
     """根据文件扩展名推断分析器名称"""
     try:
@@ -384,43 +512,57 @@ def _get_analyzer_name_from_extension(file_extension: str) -> Optional[str]:
     return None
 
 
-def _get_dynamic_language_extensions() -> Dict[str, List[str]]:
-    """动态获取语言扩展名映射，零硬编码"""
-    language_extensions = {}
-
+def _get_dynamic_language_extensions() -> Mapping[str, List[str]]:
+    """动态获取语言扩展名映射，零硬编码（按分析器注册表版本缓存，返回只读映射）"""
     try:
         # 尝试从语言分析器管理器获取
         from .language_analyzer_manager import get_analyzer_manager
         manager = get_analyzer_manager()
         if manager:
-            analyzers = manager.get_available_analyzers()
-            for analyzer_name, analyzer_info in analyzers.items():
-                if hasattr(analyzer_info, 'file_extensions'):
-                    language_extensions[analyzer_name] = analyzer_info.file_extensions
+            return _language_extensions_of(manager, manager.registry_version)
     except ImportError:
         pass
     except Exception as e:
         logger.error(f"获取动态语言扩展名失败: {e}")
 
-    return language_extensions
+    return MappingProxyType({})
+
+
+@lru_cache(maxsize=1)
+def _language_extensions_of(manager, registry_version: int) -> Mapping[str, List[str]]:
+    """从分析器管理器构建语言扩展名映射，注册表版本不变时复用"""
+    language_extensions = {}
+    for analyzer_name, analyzer_info in manager.get_available_analyzers().items():
+        if hasattr(analyzer_info, 'file_extensions'):
+            language_extensions[analyzer_name] = analyzer_info.file_extensions
+    return MappingProxyType(language_extensions)
 
-def _get_file_language_mapping(self) -> Dict[str, str]:
-    """动态获取文件扩展名到语言的映射，零硬编码"""
-    mapping = {}
 
+def _get_file_language_mapping() -> Mapping[str, str]:
+    """动态获取文件扩展名到语言的映射，零硬编码（按分析器注册表版本缓存，返回只读映射）"""
     try:
         # 尝试从语言分析器管理器获取
         from .language_analyzer_manager import get_analyzer_manager
         manager = get_analyzer_manager()
         if manager:
-            analyzers = manager.get_available_analyzers()
-            for analyzer_name, analyzer_info in analyzers.items():
-                if hasattr(analyzer_info, 'file_extensions'):
-                    for ext in analyzer_info.file_extensions:
-                        mapping[ext] = analyzer_name
+            return _file_language_mapping_of(manager, manager.registry_version)
     except ImportError:
         pass
     except Exception as e:
         logger.warning(f"获取文件语言映射失败: {e}")
 
-    return mapping
+    return MappingProxyType({})
+
+
+@lru_cache(maxsize=1)
+def _file_language_mapping_of(manager, registry_version: int) -> Mapping[str, str]:
+    """
+    从语言扩展名映射反向构建扩展名到语言的映射，注册表版本不变时复用
+
+    多个语言声明同一扩展名时取第一个，与按语言顺序逐个查找扩展名列表的结果一致
+    """
+    mapping = {}
+    for analyzer_name, extensions in _language_extensions_of(manager, registry_version).items():
+        for ext in extensions:
+            mapping.setdefault(ext, analyzer_name)
+    return MappingProxyType(mapping)
@@ -6,11 +6,115 @@
 """
 
 import logging
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+from .project_structure_analyzer import load_package_json
+from .source_utils import iter_dir_entries
 
 logger = logging.getLogger(__name__)
 
+# 各类项目的特征目录/文件名（目录按原名匹配，文件名不区分大小写）
+_CONFIG_NAMES = frozenset({'config', 'conf', 'settings', 'env', '.env'})
+_DOC_NAMES = frozenset({'docs', 'documentation', 'readme', 'README', 'guide', 'manual'})
+_DOC_NAMES_LOWER = frozenset(name.lower() for name in _DOC_NAMES)
+_DATA_NAMES = frozenset({'data', 'dataset', 'raw', 'processed', 'input', 'output'})
+_TEST_NAMES = frozenset({'test', 'tests', 'spec', 'specs', 'e2e', 'integration'})
+_BUILD_NAMES = frozenset({'build', 'scripts', 'tools', 'ci', 'cd'})
+_VUE_CONFIG_NAMES = frozenset({'vue.config.js', 'vite.config.js', 'nuxt.config.js'})
+# 各类项目的特征文件扩展名
+_CONFIG_EXTENSIONS = frozenset({'.yaml', '.yml', '.json', '.xml', '.properties', '.ini', '.toml'})
+_DOC_EXTENSIONS = frozenset({'.md', '.rst', '.txt', '.html', '.pdf'})
+_DATA_EXTENSIONS = frozenset({'.csv', '.json', '.xml', '.yaml', '.yml', '.sql', '.db', '.sqlite'})
+_TEST_EXTENSIONS = frozenset({'.test.js', '.spec.js', '.test.ts', '.spec.ts', '.test.py', '.spec.py'})
+_BUILD_EXTENSIONS = frozenset({'.sh', '.bat', '.ps1', '.py', '.js', '.ts'})
+_SOURCE_EXTENSIONS = frozenset({'.java', '.py', '.js', '.ts', '.vue', '.cpp', '.c', '.h', '.cs', '.go', '.rs'})
+# 查找源代码文件时不进入的目录：依赖、版本控制、虚拟环境、构建产物与IDE目录
+_SOURCE_SCAN_SKIP_DIRS = frozenset({
+    'node_modules', '.git', '.hg', '.svn', 'venv', '.venv', '__pycache__',
+    'target', 'dist', 'build', '.idea', '.vscode', 'coverage'
+})
+
+# 项目标记规则，按优先级排列：(标记文件名, 标记文件扩展名, 项目类型, 日志中的项目名)；
+# 项目类型为 None 表示Node.js项目，由检测器解析package.json进一步区分
+_PROJECT_MARKERS = (
+    (frozenset({'pom.xml'}), frozenset(), 'Java/Maven项目', 'Maven项目'),
+    (frozenset({'build.gradle'}), frozenset(), 'Java/Gradle项目', 'Gradle项目'),
+    (frozenset({'package.json'}), frozenset(), None, 'Node.js项目'),
+    (frozenset({'requirements.txt', 'setup.py'}), frozenset(), 'Python项目', 'Python项目'),
+    (frozenset({'Cargo.toml'}), frozenset(), 'Rust项目', 'Rust项目'),
+    (frozenset({'go.mod'}), frozenset(), 'Go项目', 'Go项目'),
+    (frozenset({'Gemfile'}), frozenset(), 'Ruby项目', 'Ruby项目'),
+    (frozenset({'composer.json'}), frozenset(), 'PHP项目', 'PHP项目'),
+    (frozenset({'Dockerfile', 'docker-compose.yml'}), frozenset(), 'Docker项目', 'Docker项目'),
+    # .NET项目文件名各不相同，按项目文件扩展名匹配
+    (frozenset(), frozenset({'.csproj', '.vbproj', '.fsproj'}), '.NET项目', '.NET项目'),
+    (frozenset({'build.sbt'}), frozenset(), 'Scala项目', 'Scala项目'),
+    (frozenset({'build.gradle.kts'}), frozenset(), 'Kotlin项目', 'Kotlin项目'),
+)
+
+
+def _scan_module_once(module_path: Path) -> Tuple[Set[str], Set[str], Set[str]]:
+    """
+    扫描一次模块顶层目录，返回 (全部条目名, 小写文件名, 文件扩展名) 三个集合
+
+    项目类型检测的各项检查共用同一份扫描结果（一次 getdents 代替逐个文件 stat 与多次 iterdir）；
+    扩展名规则与 Path.suffix 一致（只取最后一段，以点开头或结尾的名称没有扩展名）
+    """
+    entry_names = set()
+    file_names_lower = set()
+    file_suffixes = set()
+    with os.scandir(module_path) as entries:
+        for entry in entries:
+            name = entry.name
+            entry_names.add(name)
+            try:
+                is_file = entry.is_file()
+            except OSError:
+                continue
+            if is_file:
+                file_names_lower.add(name.lower())
+                file_suffixes.add(_name_suffix(name))
+    return entry_names, file_names_lower, file_suffixes
+
+
+def _name_suffix(name: str) -> str:
+    """取文件名的扩展名，规则与 Path.suffix 一致"""
+    dot = name.rfind('.')
+    return name[dot:] if 0 < dot < len(name) - 1 else ''
+
+
+def _is_vue_package(entry_names: Set[str], package_data: Dict[str, Any]) -> bool:
+    """根据顶层目录条目与已解析的package.json判断是否为Vue项目：存在Vue相关配置文件或依赖中包含vue"""
+    if not entry_names.isdisjoint(_VUE_CONFIG_NAMES):
+        return True
+    dependencies = package_data.get('dependencies', {})
+    dev_dependencies = package_data.get('devDependencies', {})
+    return 'vue' in dependencies or 'vue' in dev_dependencies
+
+
+def _contains_source_file(module_path: Path, source_extensions: frozenset) -> bool:
+    """
+    递归查找目录下是否存在指定扩展名的文件，找到第一个即返回
+
+    不进入 _SOURCE_SCAN_SKIP_DIRS 中的目录（依赖、构建产物等目录文件众多且不代表模块自身的源代码）
+    """
+    for entry in iter_dir_entries(str(module_path), _is_source_scan_skip_dir):
+        try:
+            if _name_suffix(entry.name) in source_extensions and entry.is_file():
+                return True
+        except OSError:
+            continue
+    return False
+
+
+def _is_source_scan_skip_dir(entry: os.DirEntry) -> bool:
+    """查找源代码文件时是否跳过该目录"""
+    return entry.name in _SOURCE_SCAN_SKIP_DIRS
+
 
 class ProjectDetector:
     """项目类型检测器"""
@@ -29,118 +133,118 @@ class ProjectDetector:
         Returns:
             项目类型字符串
         """
-        if not module_path.exists() or not module_path.is_dir():
+        try:
+            dir_stat = os.stat(module_path)
+        except OSError:
+            return '未知项目'
+        if not stat.S_ISDIR(dir_stat.st_mode):
             return '未知项目'
 
-        # 检查Java/Maven项目
-        if (module_path / 'pom.xml').exists():
-            logger.debug(f"检测到Maven项目: {module_path}")
-            return 'Java/Maven项目'
-
-        # 检查Java/Gradle项目
-        if (module_path / 'build.gradle').exists():
-            logger.debug(f"检测到Gradle项目: {module_path}")
-            return 'Java/Gradle项目'
-
-        # 检查Node.js项目
-        if (module_path / 'package.json').exists():
-            return self._detect_nodejs_project_type(module_path)
-
-        # 检查Python项目
-        if (module_path / 'requirements.txt').exists() or (module_path / 'setup.py').exists():
-            logger.debug(f"检测到Python项目: {module_path}")
-            return 'Python项目'
-
-        # 检查Rust项目
-        if (module_path / 'Cargo.toml').exists():
-            logger.debug(f"检测到Rust项目: {module_path}")
-            return 'Rust项目'
-
-        # 检查Go项目
-        if (module_path / 'go.mod').exists():
-            logger.debug(f"检测到Go项目: {module_path}")
-            return 'Go项目'
-
-        # 检查Ruby项目
-        if (module_path / 'Gemfile').exists():
-            logger.debug(f"检测到Ruby项目: {module_path}")
-            return 'Ruby项目'
-
-        # 检查PHP项目
-        if (module_path / 'composer.json').exists():
-            logger.debug(f"检测到PHP项目: {module_path}")
-            return 'PHP项目'
-
-        # 检查Docker项目
-        if (module_path / 'Dockerfile').exists() or (module_path / 'docker-compose.yml').exists():
-            logger.debug(f"检测到Docker项目: {module_path}")
-            return 'Docker项目'
-
-        # 检查.NET项目
-        if (module_path / '*.csproj').exists() or (module_path / '*.vbproj').exists():
-            logger.debug(f"检测到.NET项目: {module_path}")
-            return '.NET项目'
-
-        # 检查Scala项目
-        if (module_path / 'build.sbt').exists():
-            logger.debug(f"检测到Scala项目: {module_path}")
-            return 'Scala项目'
-
-        # 检查Kotlin项目
-        if (module_path / 'build.gradle.kts').exists():
-            logger.debug(f"检测到Kotlin项目: {module_path}")
-            return 'Kotlin项目'
+        # 顶层目录条目与package.json均未变化时，由顶层内容决定的检测结果不变，直接复用
+        module_dir = os.fspath(module_path)
+        package_stamp = _file_stamp(os.path.join(module_dir, 'package.json'))
+        module_type, top_level_source = _cached_top_level_type(self, module_dir, dir_stat.st_mtime_ns, package_stamp)
+        if module_type is not None:
+            return module_type
+
+        # 检查是否有源代码文件（取决于整个目录树，子目录内的变化不改变模块目录的修改时间，不缓存）
+        if top_level_source or self._has_source_code(module_path):
+            logger.debug(f"检测到源代码项目: {module_path}")
+            return '源代码项目'
+
+        return '未知项目'
+
+    def _detect_top_level_type(self, module_path: Path) -> Tuple[Optional[str], bool]:
+        """
+        根据模块顶层目录内容检测模块类型
+
+        Returns:
+            (项目类型, 顶层是否有源代码文件)；项目类型为 None 表示顶层内容无法确定，需要检查是否包含源代码
+        """
+        # 扫描一次顶层目录，以下各项检测都在扫描结果中查找，不再逐个文件探测是否存在
+        module_scan = _scan_module_once(module_path)
+        entry_names, _, file_suffixes = module_scan
+
+        # 按优先级检查项目标记文件
+        for marker_names, marker_suffixes, project_type, project_label in _PROJECT_MARKERS:
+            if entry_names.isdisjoint(marker_names) and file_suffixes.isdisjoint(marker_suffixes):
+                continue
+            if project_type is None:
+                # package.json 需要解析依赖进一步区分框架
+                return self._detect_nodejs_project_type(module_path, module_scan), False
+            logger.debug(f"检测到{project_label}: {module_path}")
+            return project_type, False
 
         # 检查配置文件项目
-        if self._is_config_project(module_path):
+        if self._is_config_project(module_scan):
             logger.debug(f"检测到配置项目: {module_path}")
-            return '配置项目'
+            return '配置项目', False
 
         # 检查文档项目
-        if self._is_documentation_project(module_path):
+        if self._is_documentation_project(module_scan):
             logger.debug(f"检测到文档项目: {module_path}")
-            return '文档项目'
+            return '文档项目', False
 
         # 检查数据项目
-        if self._is_data_project(module_path):
+        if self._is_data_project(module_scan):
             logger.debug(f"检测到数据项目: {module_path}")
-            return '数据项目'
+            return '数据项目', False
 
         # 检查测试项目
-        if self._is_test_project(module_path):
+        if self._is_test_project(module_scan):
             logger.debug(f"检测到测试项目: {module_path}")
-            return '测试项目'
+            return '测试项目', False
 
         # 检查构建脚本项目
-        if self._is_build_script_project(module_path):
+        if self._is_build_script_project(module_scan):
             logger.debug(f"检测到构建脚本项目: {module_path}")
-            return '构建脚本项目'
+            return '构建脚本项目', False
 
         # 检查Vue项目
-        if self.is_vue_project(module_path):
+        if self.is_vue_project(module_path, module_scan):
             logger.debug(f"检测到Vue项目: {module_path}")
-            return 'Vue项目'
+            return 'Vue项目', False
 
-        # 检查是否有源代码文件
-        if self._has_source_code(module_path):
-            logger.debug(f"检测到源代码项目: {module_path}")
-            return '源代码项目'
+        return None, not file_suffixes.isdisjoint(_SOURCE_EXTENSIONS)
 
-        return '未知项目'
+    def detect_many(self, module_paths: Iterable[Path], max_workers: Optional[int] = None) -> List[str]:
+        """
+        批量检测多个模块的类型
 
-    def _detect_nodejs_project_type(self, module_path: Path) -> str:
-        """检测Node.js项目类型"""
-        package_path = module_path / 'package.json'
-        if not package_path.exists():
+        各模块的检测相互独立，耗时主要在扫描目录、读取package.json等文件系统访问上，
+        使用线程池让各模块的系统调用等待相互重叠；任一模块检测失败时抛出该异常
+
+        Args:
+            module_paths: 模块路径
+            max_workers: 最大工作线程数，默认按CPU核数的4倍（不超过32）
+
+        Returns:
+            与输入顺序一致的项目类型字符串列表
+        """
+        module_paths = list(module_paths)
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) * 4)
+        max_workers = min(max_workers, len(module_paths))
+        if max_workers <= 1:
+            return [self.detect_module_type(module_path) for module_path in module_paths]
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ProjectDetector") as executor:
+            return list(executor.map(self.detect_module_type, module_paths))
+
+    def _detect_nodejs_project_type(self, module_path: Path,
+                                    module_scan: Optional[Tuple[Set[str], Set[str], Set[str]]] = None) -> str:
+        """检测Node.js项目类型（module_scan 为可选的顶层目录扫描结果，提供时不再单独探测文件）"""
+        if module_scan is None:
+            module_scan = _scan_module_once(module_path)
+        if 'package.json' not in module_scan[0]:
             return 'Node.js项目'
+        package_path = module_path / 'package.json'
 
         try:
-            import json
-            with open(package_path, 'r', encoding='utf-8') as f:
-                package_data = json.load(f)
+            package_data = load_package_json(package_path)
 
-            # 检查Vue项目
-            if self.is_vue_project(module_path):
+            # 检查Vue项目（复用已扫描的目录条目与已解析的package.json）
+            if _is_vue_package(module_scan[0], package_data):
                 return 'Vue项目'
 
             # 检查React项目
@@ -172,257 +276,117 @@ class ProjectDetector:
             logger.warning(f"解析package.json失败: {e}")
             return 'Node.js项目'
 
-    def _is_config_project(self, module_path: Path) -> bool:
-        """检查是否为配置项目"""
-        config_files = ['config', 'conf', 'settings', 'env', '.env']
-
-        # 动态获取配置相关的文件扩展名
-        config_extensions = self._get_config_extensions()
+    def _is_config_project(self, module_scan: Tuple[Set[str], Set[str], Set[str]]) -> bool:
+        """检查是否为配置项目（module_scan 为 _scan_module_once 的扫描结果）"""
+        entry_names, _, file_suffixes = module_scan
 
-        # 检查配置目录
-        for config_dir in config_files:
-            if (module_path / config_dir).exists():
-                return True
+        # 检查配置目录（同名文件同样计入）
+        if not entry_names.isdisjoint(_CONFIG_NAMES):
+            return True
 
         # 检查配置文件
-        for file in module_path.iterdir():
-            if file.is_file():
-                if file.name in config_files or file.suffix in config_extensions:
-                    return True
-
-        return False
+        return not file_suffixes.isdisjoint(_CONFIG_EXTENSIONS)
 
-    def _is_documentation_project(self, module_path: Path) -> bool:
-        """检查是否为文档项目"""
-        doc_files = ['docs', 'documentation', 'readme', 'README', 'guide', 'manual']
-
-        # 动态获取文档相关的文件扩展名
-        doc_extensions = self._get_documentation_extensions()
+    def _is_documentation_project(self, module_scan: Tuple[Set[str], Set[str], Set[str]]) -> bool:
+        """检查是否为文档项目（module_scan 为 _scan_module_once 的扫描结果）"""
+        entry_names, file_names_lower, file_suffixes = module_scan
 
         # 检查文档目录
-        for doc_dir in doc_files:
-            if (module_path / doc_dir).exists():
-                return True
-
-        # 检查文档文件
-        for file in module_path.iterdir():
-            if file.is_file():
-                if file.name.lower() in [f.lower() for f in doc_files] or file.suffix in doc_extensions:
-                    return True
+        if not entry_names.isdisjoint(_DOC_NAMES):
+            return True
 
-        return False
+        # 检查文档文件（文件名不区分大小写）
+        return (not file_names_lower.isdisjoint(_DOC_NAMES_LOWER)
+                or not file_suffixes.isdisjoint(_DOC_EXTENSIONS))
 
-    def _is_data_project(self, module_path: Path) -> bool:
-        """检查是否为数据项目"""
-        data_files = ['data', 'dataset', 'raw', 'processed', 'input', 'output']
-
-        # 动态获取数据相关的文件扩展名
-        data_extensions = self._get_data_extensions()
+    def _is_data_project(self, module_scan: Tuple[Set[str], Set[str], Set[str]]) -> bool:
+        """检查是否为数据项目（module_scan 为 _scan_module_once 的扫描结果）"""
+        entry_names, file_names_lower, file_suffixes = module_scan
 
         # 检查数据目录
-        for data_dir in data_files:
-            if (module_path / data_dir).exists():
-                return True
+        if not entry_names.isdisjoint(_DATA_NAMES):
+            return True
 
-        # 检查数据文件
-        for file in module_path.iterdir():
-            if file.is_file():
-                if file.name.lower() in [f.lower() for f in data_files] or file.suffix in data_extensions:
-                    return True
+        # 检查数据文件（文件名不区分大小写）
+        return (not file_names_lower.isdisjoint(_DATA_NAMES)
+                or not file_suffixes.isdisjoint(_DATA_EXTENSIONS))
 
-        return False
-
-    def _is_test_project(self, module_path: Path) -> bool:
-        """检查是否为测试项目"""
-        test_files = ['test', 'tests', 'spec', 'specs', 'e2e', 'integration']
-
-        # 动态获取测试相关的文件扩展名
-        test_extensions = self._get_test_extensions()
+    def _is_test_project(self, module_scan: Tuple[Set[str], Set[str], Set[str]]) -> bool:
+        """检查是否为测试项目（module_scan 为 _scan_module_once 的扫描结果）"""
+        entry_names, file_names_lower, file_suffixes = module_scan
 
         # 检查测试目录
-        for test_dir in test_files:
-            if (module_path / test_dir).exists():
-                return True
-
-        # 检查测试文件
-        for file in module_path.iterdir():
-            if file.is_file():
-                if file.name.lower() in [f.lower() for f in test_files] or file.suffix in test_extensions:
-                    return True
-
-        return False
+        if not entry_names.isdisjoint(_TEST_NAMES):
+            return True
 
-    def _is_build_script_project(self, module_path: Path) -> bool:
-        """检查是否为构建脚本项目"""
-        build_files = ['build', 'scripts', 'tools', 'ci', 'cd']
+        # 检查测试文件（文件名不区分大小写）
+        return (not file_names_lower.isdisjoint(_TEST_NAMES)
+                or not file_suffixes.isdisjoint(_TEST_EXTENSIONS))
 
-        # 动态获取构建相关的文件扩展名
-        build_extensions = self._get_build_extensions()
+    def _is_build_script_project(self, module_scan: Tuple[Set[str], Set[str], Set[str]]) -> bool:
+        """检查是否为构建脚本项目（module_scan 为 _scan_module_once 的扫描结果）"""
+        entry_names, file_names_lower, file_suffixes = module_scan
 
         # 检查构建目录
-        for build_dir in build_files:
-            if (module_path / build_dir).exists():
-                return True
+        if not entry_names.isdisjoint(_BUILD_NAMES):
+            return True
 
-        # 检查构建文件
-        for file in module_path.iterdir():
-            if file.is_file():
-                if file.name.lower() in [f.lower() for f in build_files] or file.suffix in build_extensions:
-                    return True
+        # 检查构建文件（文件名不区分大小写）
+        return (not file_names_lower.isdisjoint(_BUILD_NAMES)
+                or not file_suffixes.isdisjoint(_BUILD_EXTENSIONS))
 
-        return False
+    def is_vue_project(self, module_path: Path,
+                       module_scan: Optional[Tuple[Set[str], Set[str], Set[str]]] = None) -> bool:
+        """检查是否为Vue项目（module_scan 为可选的顶层目录扫描结果，提供时不再单独探测文件）"""
+        if module_scan is None:
+            module_scan = _scan_module_once(module_path)
+        entry_names = module_scan[0]
 
-    def is_vue_project(self, module_path: Path) -> bool:
-        """检查是否为Vue项目"""
         # 检查Vue相关文件
-        vue_files = ['vue.config.js', 'vite.config.js', 'nuxt.config.js']
-        for vue_file in vue_files:
-            if (module_path / vue_file).exists():
-                return True
+        if not entry_names.isdisjoint(_VUE_CONFIG_NAMES):
+            return True
 
         # 检查package.json中的Vue依赖
-        package_path = module_path / 'package.json'
-        if package_path.exists():
-            try:
-                import json
-                with open(package_path, 'r', encoding='utf-8') as f:
-                    package_data = json.load(f)
-
-                dependencies = package_data.get('dependencies', {})
-                dev_dependencies = package_data.get('devDependencies', {})
-
-                if 'vue' in dependencies or 'vue' in dev_dependencies:
-                    return True
-
-            except Exception:
-                pass
-
-        return False
-
-    def _has_source_code(self, module_path: Path) -> bool:
-        """检查是否包含源代码文件"""
-        # 动态获取源代码相关的文件扩展名
-        source_extensions = self._get_source_extensions()
-
-        for file in module_path.rglob('*'):
-            if file.is_file() and file.suffix in source_extensions:
-                return True
-
-        return False
-
-    def _get_config_extensions(self) -> List[str]:
-        """动态获取配置相关的文件扩展名"""
+        if 'package.json' not in entry_names:
+            return False
         try:
-            if hasattr(self, 'language_manager') and self.language_manager:
-                extensions = []
-                analyzers = self.language_manager.get_available_analyzers()
-                config_languages = ['json', 'yaml', 'xml', 'properties']
-                for lang in config_languages:
-                    if lang in analyzers:
-                        analyzer_info = analyzers[lang]
-                        if hasattr(analyzer_info, 'file_extensions'):
-                            extensions.extend(analyzer_info.file_extensions)
-                return extensions
+            return _is_vue_package(entry_names, load_package_json(module_path / 'package.json'))
         except Exception:
-            pass
+            return False
 
-        # 后备方案
-        return ['.yaml', '.yml', '.json', '.xml', '.properties', '.ini', '.toml']
-
-    def _get_documentation_extensions(self) -> List[str]:
-        """动态获取文档相关的文件扩展名"""
-        try:
-            if hasattr(self, 'language_manager') and self.language_manager:
-                extensions = []
-                analyzers = self.language_manager.get_available_analyzers()
-                doc_languages = ['markdown', 'rst']
-                for lang in doc_languages:
-                    if lang in analyzers:
-                        analyzer_info = analyzers[lang]
-                        if hasattr(analyzer_info, 'file_extensions'):
-                            extensions.extend(analyzer_info.file_extensions)
-                return extensions
-        except Exception:
-            pass
-
-        # 后备方案
-        return ['.md', '.rst', '.txt', '.html', '.pdf']
+    def _has_source_code(self, module_path: Path) -> bool:
+        """检查是否包含源代码文件"""
+        return _contains_source_file(module_path, _SOURCE_EXTENSIONS)
 
-    def _get_data_extensions(self) -> List[str]:
-        """动态获取数据相关的文件扩展名"""
-        try:
-            if hasattr(self, 'language_manager') and self.language_manager:
-                extensions = []
-                analyzers = self.language_manager.get_available_analyzers()
-                data_languages = ['csv', 'json', 'xml', 'yaml', 'sql']
-                for lang in data_languages:
-                    if lang in analyzers:
-                        analyzer_info = analyzers[lang]
-                        if hasattr(analyzer_info, 'file_extensions'):
-                            extensions.extend(analyzer_info.file_extensions)
-                return extensions
-        except Exception:
-            pass
 
-        # 后备方案
-        return ['.csv', '.json', '.xml', '.yaml', '.yml', '.sql', '.db', '.sqlite']
+@lru_cache(maxsize=4096)
+def _cached_top_level_type(detector: ProjectDetector, module_dir: str, mtime_ns: int,
+                           package_stamp: Optional[Tuple[int, int]]) -> Tuple[Optional[str], bool]:
+    """
+    按 (模块目录, 目录修改时间, package.json状态) 缓存顶层内容的检测结果
 
-    def _get_test_extensions(self) -> List[str]:
-        """动态获取测试相关的文件扩展名"""
-        try:
-            if hasattr(self, 'language_manager') and self.language_manager:
-                extensions = []
-                analyzers = self.language_manager.get_available_analyzers()
-                test_languages = ['javascript', 'typescript', 'python']
-                for lang in test_languages:
-                    if lang in analyzers:
-                        analyzer_info = analyzers[lang]
-                        if hasattr(analyzer_info, 'file_extensions'):
-                            # 添加测试文件后缀
-                            for ext in analyzer_info.file_extensions:
-                                base_ext = ext.replace('.', '')
-                                extensions.extend([f'.test.{base_ext}', f'.spec.{base_ext}'])
-                return extensions
-        except Exception:
-            pass
+    顶层条目的增删会更新目录修改时间，package.json内容的修改由其修改时间与大小反映
+    """
+    return detector._detect_top_level_type(Path(module_dir))
 
-        # 后备方案
-        return ['.test.js', '.spec.js', '.test.ts', '.spec.ts', '.test.py', '.spec.py']
 
-    def _get_build_extensions(self) -> List[str]:
-        """动态获取构建相关的文件扩展名"""
-        try:
-            if hasattr(self, 'language_manager') and self.language_manager:
-                extensions = []
-                analyzers = self.language_manager.get_available_analyzers()
-                build_languages = ['shell', 'python', 'javascript', 'typescript']
-                for lang in build_languages:
-                    if lang in analyzers:
-                        analyzer_info = analyzers[lang]
-                        if hasattr(analyzer_info, 'file_extensions'):
-                            extensions.extend(analyzer_info.file_extensions)
-                return extensions
-        except Exception:
-            pass
+def _file_stamp(file_path: str) -> Optional[Tuple[int, int]]:
+    """文件的 (修改时间, 大小)，文件不存在时返回 None"""
+    try:
+        file_stat = os.stat(file_path)
+    except OSError:
+        return None
+    return file_stat.st_mtime_ns, file_stat.st_size
 
-        # 后备方案
-        return ['.sh', '.bat', '.ps1', '.py', '.js', '.ts']
 
-    def _get_source_extensions(self) -> List[str]:
-        """动态获取源代码相关的文件扩展名"""
-        try:
-            if hasattr(self, 'language_manager') and self.language_manager:
-                extensions = []
-                analyzers = self.language_manager.get_available_analyzers()
-                for analyzer_name, analyzer_info in analyzers.items():
-                    if hasattr(analyzer_info, 'file_extensions'):
-                        extensions.extend(analyzer_info.file_extensions)
-                return extensions
-        except Exception:
-            pass
+def clear_module_type_cache() -> None:
+    """
+    清空模块类型检测缓存
 
-        # 后备方案
-        return ['.java', '.py', '.js', '.ts', '.vue', '.cpp', '.c', '.h', '.cs', '.go', '.rs']
+    缓存按目录修改时间失效；在修改时间精度较粗的文件系统上，同一时间片内先后增删标记文件
+    （如测试中反复构造同名临时目录）可能命中旧结果，测试或需要强制重新检测时调用
+    """
+    _cached_top_level_type.cache_clear()
 
 
 # 全局项目检测器实例
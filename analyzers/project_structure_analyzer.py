@@ -5,13 +5,91 @@
 包含Maven项目、Package.json、Vue项目结构等分析功能
 """
 
+import copy
 import json
+import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+from .source_utils import iter_dir_entries
+
+# orjson为可选依赖，安装后package.json由orjson直接解析UTF-8字节
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# POM元素标签（Maven 4.0.0 命名空间）
+_POM_NAMESPACE = '{http://maven.apache.org/POM/4.0.0}'
+_POM_DEPENDENCY_TAG = _POM_NAMESPACE + 'dependency'
+_POM_PLUGIN_TAG = _POM_NAMESPACE + 'plugin'
+_POM_PROPERTIES_TAG = _POM_NAMESPACE + 'properties'
+_POM_GROUP_ID_TAG = _POM_NAMESPACE + 'groupId'
+_POM_ARTIFACT_ID_TAG = _POM_NAMESPACE + 'artifactId'
+_POM_VERSION_TAG = _POM_NAMESPACE + 'version'
+# 需要提取的POM属性：属性名 -> 结果键
+_POM_PROPERTY_KEYS = {
+    'java.version': 'java_version',
+    'maven.compiler.source': 'maven_compiler_source',
+    'maven.compiler.target': 'maven_compiler_target'
+}
+# package.json中会被读取的字段，缓存只保留这些字段
+_PACKAGE_JSON_KEYS = (
+    'name', 'version', 'description', 'main', 'author',
+    'dependencies', 'devDependencies', 'scripts', 'engines'
+)
+
+
+@lru_cache(maxsize=256)
+def _cached_package_json(path_str: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """
+    按 (路径, 修改时间, 文件大小) 缓存package.json的解析结果；缓存对象共享，不直接交给外部调用方
+
+    只保留 _PACKAGE_JSON_KEYS 中的字段，files、workspaces、各类工具配置等其余内容解析后即释放，不随缓存常驻
+    """
+    if ORJSON_AVAILABLE:
+        package_data = orjson.loads(Path(path_str).read_bytes())
+    else:
+        with open(path_str, 'r', encoding='utf-8') as f:
+            package_data = json.load(f)
+    if not isinstance(package_data, dict):
+        return package_data
+    return {key: package_data[key] for key in _PACKAGE_JSON_KEYS if key in package_data}
+
+
+def load_package_json(package_path: Path) -> Dict[str, Any]:
+    """
+    读取并解析package.json
+
+    项目类型检测与项目结构分析会多次读取同一个package.json，文件未变化时复用上次的解析结果；
+    返回共享对象，调用方只读。文件不存在或解析失败时抛出异常
+    """
+    file_stat = package_path.stat()
+    return _cached_package_json(str(package_path), file_stat.st_mtime_ns, file_stat.st_size)
+
+
+def _pom_coordinates(element) -> Optional[Dict[str, Any]]:
+    """提取依赖/插件元素的 groupId、artifactId 与 version，缺少 groupId 或 artifactId 时返回 None"""
+    group_id = element.find(_POM_GROUP_ID_TAG)
+    artifact_id = element.find(_POM_ARTIFACT_ID_TAG)
+    if group_id is None or artifact_id is None:
+        return None
+    version = element.find(_POM_VERSION_TAG)
+    return {
+        'group_id': group_id.text,
+        'artifact_id': artifact_id.text,
+        'version': version.text if version is not None else 'N/A'
+    }
 
 
 def analyze_maven_project(module_path: Path) -> Dict[str, Any]:
-    """分析Maven项目结构"""
+    """
+    分析Maven项目结构
+
+    流式解析POM文件，一次扫描同时提取依赖、插件与首个属性块，处理完的元素随即清空释放
+    """
     result = {
         'type': 'Java/Maven项目',
         'build_tool': 'Maven',
@@ -24,49 +102,38 @@ def analyze_maven_project(module_path: Path) -> Dict[str, Any]:
     if pom_path.exists():
         try:
             import xml.etree.ElementTree as ET
-            tree = ET.parse(pom_path)
-            root = tree.getroot()
-
-            # 提取依赖信息
-            dependencies = root.findall('.//{http://maven.apache.org/POM/4.0.0}dependency')
-            for dep in dependencies:
-                group_id = dep.find('{http://maven.apache.org/POM/4.0.0}groupId')
-                artifact_id = dep.find('{http://maven.apache.org/POM/4.0.0}artifactId')
-                version = dep.find('{http://maven.apache.org/POM/4.0.0}version')
-
-                if group_id is not None and artifact_id is not None:
-                    dep_info = {
-                        'group_id': group_id.text,
-                        'artifact_id': artifact_id.text,
-                        'version': version.text if version is not None else 'N/A'
-                    }
-                    result['dependencies'].append(dep_info)
-
-            # 提取插件信息
-            plugins = root.findall('.//{http://maven.apache.org/POM/4.0.0}plugin')
-            for plugin in plugins:
-                group_id = plugin.find('{http://maven.apache.org/POM/4.0.0}groupId')
-                artifact_id = plugin.find('{http://maven.apache.org/POM/4.0.0}artifactId')
-                version = plugin.find('{http://maven.apache.org/POM/4.0.0}version')
-
-                if group_id is not None and artifact_id is not None:
-                    plugin_info = {
-                        'group_id': group_id.text,
-                        'artifact_id': artifact_id.text,
-                        'version': version.text if version is not None else 'N/A'
-                    }
-                    result['plugins'].append(plugin_info)
-
-            # 提取属性信息
-            properties = root.find('.//{http://maven.apache.org/POM/4.0.0}properties')
-            if properties is not None:
-                for prop in properties:
-                    if prop.tag.endswith('}java.version'):
-                        result['properties']['java_version'] = prop.text
-                    elif prop.tag.endswith('}maven.compiler.source'):
-                        result['properties']['maven_compiler_source'] = prop.text
-                    elif prop.tag.endswith('}maven.compiler.target'):
-                        result['properties']['maven_compiler_target'] = prop.text
+
+            dependencies = []
+            plugins = []
+            properties = None
+            for _, element in ET.iterparse(pom_path, events=('end',)):
+                tag = element.tag
+                if tag == _POM_DEPENDENCY_TAG:
+                    # 提取依赖信息
+                    dep_info = _pom_coordinates(element)
+                    if dep_info is not None:
+                        dependencies.append(dep_info)
+                    element.clear()
+                elif tag == _POM_PLUGIN_TAG:
+                    # 提取插件信息
+                    plugin_info = _pom_coordinates(element)
+                    if plugin_info is not None:
+                        plugins.append(plugin_info)
+                    element.clear()
+                elif tag == _POM_PROPERTIES_TAG and properties is None:
+                    # 提取属性信息（只取文档中的第一个属性块）
+                    properties = {}
+                    for prop in element:
+                        _, brace, name = prop.tag.rpartition('}')
+                        key = _POM_PROPERTY_KEYS.get(name) if brace else None
+                        if key is not None:
+                            properties[key] = prop.text
+
+            # 整个文件解析成功后才写入结果，解析失败时与一次性解析一样不返回部分结果
+            result['dependencies'] = dependencies
+            result['plugins'] = plugins
+            if properties:
+                result['properties'] = properties
 
         except Exception as e:
             result['error'] = f"解析POM文件失败: {str(e)}"
@@ -88,8 +155,8 @@ def analyze_package_json(module_path: Path) -> Dict[str, Any]:
     package_path = module_path / 'package.json'
     if package_path.exists():
         try:
-            with open(package_path, 'r', encoding='utf-8') as f:
-                package_data = json.load(f)
+            # 解析结果的依赖、脚本等字典会直接放入返回结果，复制一份，避免调用方修改影响缓存
+            package_data = copy.deepcopy(load_package_json(package_path))
 
             # 基本信息
             result['metadata'] = {
@@ -127,6 +194,24 @@ def analyze_package_json(module_path: Path) -> Dict[str, Any]:
     return result
 
 
+def _summarize_directory(dir_path: Path) -> Tuple[int, List[str]]:
+    """统计目录下的条目总数（递归，含子目录本身）并列出直接子目录名，一次遍历完成"""
+    root = os.fspath(dir_path)
+    # 顶层条目的路径为 "顶层目录/名称"，据此从遍历结果中区分顶层条目
+    top_path_length = len(os.path.join(root, ''))
+    entry_count = 0
+    sub_dirs = []
+    for entry in iter_dir_entries(root):
+        entry_count += 1
+        if len(entry.path) == top_path_length + len(entry.name):
+            try:
+                if entry.is_dir():
+                    sub_dirs.append(entry.name)
+            except OSError:
+                continue
+    return entry_count, sub_dirs
+
+
 def analyze_vue_project_structure(module_path: Path) -> Dict[str, Any]:
     """分析Vue项目结构"""
     result = {
@@ -149,8 +234,7 @@ def analyze_vue_project_structure(module_path: Path) -> Dict[str, Any]:
     # 检查构建工具
     if (module_path / 'package.json').exists():
         try:
-            with open(module_path / 'package.json', 'r', encoding='utf-8') as f:
-                package_data = json.load(f)
+            package_data = load_package_json(module_path / 'package.json')
 
             dependencies = package_data.get('dependencies', {})
             dev_dependencies = package_data.get('devDependencies', {})
@@ -171,11 +255,12 @@ def analyze_vue_project_structure(module_path: Path) -> Dict[str, Any]:
     common_dirs = ['src', 'public', 'components', 'views', 'router', 'store', 'assets']
     for dir_name in common_dirs:
         dir_path = module_path / dir_name
-        if dir_path.exists() and dir_path.is_dir():
+        if dir_path.is_dir():
+            file_count, sub_dirs = _summarize_directory(dir_path)
             result['structure'][dir_name] = {
                 'exists': True,
-                'file_count': len(list(dir_path.rglob('*'))),
-                'sub_dirs': [d.name for d in dir_path.iterdir() if d.is_dir()]
+                'file_count': file_count,
+                'sub_dirs': sub_dirs
             }
         else:
             result['structure'][dir_name] = {'exists': False}
@@ -7,11 +7,77 @@
 
 import json
 import logging
+import os
+import uuid
 from datetime import datetime
-from typing import Dict, Any, Optional
+from itertools import islice
+from typing import Dict, Any, Optional, Union
+
+# orjson为可选依赖，安装后报告由orjson直接序列化为UTF-8字节
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# 工作量估算模块在导入时加载一次，导入失败时报告中记录错误
+try:
+    from .effort_analyzer import calculate_work_effort_estimate
+    _EFFORT_IMPORT_ERROR = None
+except ImportError as e:
+    calculate_work_effort_estimate = None
+    _EFFORT_IMPORT_ERROR = e
+
+# orjson序列化选项：允许非字符串键；日期时间交给 default=str 处理，与json模块输出的格式一致
+_ORJSON_REPORT_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY
+    if ORJSON_AVAILABLE else 0
+)
+# 临时报告文件的打开标志：必须新建（同名已存在则失败），Windows 下以二进制模式写入
+_TEMP_REPORT_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+# 紧凑格式的分隔符（不含空格）
+_COMPACT_SEPARATORS = (',', ':')
+# 缩进格式逐段编码时每批合并的片段数
+_ENCODE_BATCH_CHUNKS = 8192
+# 缺少字段时共用的空字典（只读），避免逐个模块创建默认值
+_EMPTY_DICT: Dict[str, Any] = {}
+# 摘要输出的分隔线
+_SUMMARY_SEPARATOR = "=" * 80
+_SECTION_SEPARATOR = "-" * 50
+
+
+def _serialize_report(results: Dict[str, Any], pretty: bool = False) -> Union[bytes, bytearray]:
+    """
+    将分析结果序列化为UTF-8编码的JSON
+
+    Args:
+        results: 分析结果
+        pretty: 是否缩进2格输出，默认输出紧凑格式
+    """
+    if ORJSON_AVAILABLE:
+        options = _ORJSON_REPORT_OPTIONS | orjson.OPT_INDENT_2 if pretty else _ORJSON_REPORT_OPTIONS
+        try:
+            return orjson.dumps(results, default=str, option=options)
+        except orjson.JSONEncodeError as e:
+            # 超出64位的整数、嵌套过深等orjson不支持的内容，回退到json模块
+            logger.debug(f"orjson序列化报告失败，回退到json模块: {e}")
+    if pretty:
+        # 缩进格式只能由纯Python编码器逐段生成，分批合并编码写入缓冲区，
+        # 避免同时持有全部片段、完整字符串与编码结果三份数据
+        chunks = json.JSONEncoder(ensure_ascii=False, indent=2, default=str).iterencode(results)
+        report_bytes = bytearray()
+        while True:
+            batch = ''.join(islice(chunks, _ENCODE_BATCH_CHUNKS))
+            if not batch:
+                return report_bytes
+            report_bytes += batch.encode('utf-8')
+    # 不缩进时使用C加速的编码器
+    report_text = json.dumps(results, ensure_ascii=False, separators=_COMPACT_SEPARATORS, default=str)
+    return report_text.encode('utf-8')
+
 
 class ReportGenerator:
     """报告生成器"""
@@ -29,12 +95,13 @@ class ReportGenerator:
         self.stats = stats
         self.config = config
 
-    def generate_report(self, output_file: Optional[str] = None) -> str:
+    def generate_report(self, output_file: Optional[str] = None, pretty: bool = False) -> str:
         """
         生成分析报告
 
         Args:
             output_file: 输出文件路径，如果为None则使用默认路径
+            pretty: 是否输出缩进格式的JSON，默认输出紧凑格式
 
         Returns:
             输出文件路径
@@ -42,22 +109,21 @@ class ReportGenerator:
         try:
             # 添加工作量估算
             if 'effort_estimate' not in self.results or self.results['effort_estimate'] is None:
-                try:
-                    from .effort_analyzer import calculate_work_effort_estimate
-
-                    effort_result = calculate_work_effort_estimate(self.results)
-
-                    if effort_result and 'error' not in effort_result:
-                        self.results['effort_estimate'] = effort_result
-                    else:
-                        error_msg = effort_result.get('error', '未知错误') if effort_result else '返回结果为空'
-                        self.results['effort_estimate'] = {'error': error_msg}
-                except ImportError as e:
-                    logger.error(f"导入 effort_analyzer 模块失败: {e}")
-                    self.results['effort_estimate'] = {'error': f'模块导入失败: {e}'}
-                except Exception as e:
-                    logger.error(f"计算工作量估算时发生异常: {e}")
-                    self.results['effort_estimate'] = {'error': f'计算失败: {e}'}
+                if calculate_work_effort_estimate is None:
+                    logger.error(f"导入 effort_analyzer 模块失败: {_EFFORT_IMPORT_ERROR}")
+                    self.results['effort_estimate'] = {'error': f'模块导入失败: {_EFFORT_IMPORT_ERROR}'}
+                else:
+                    try:
+                        effort_result = calculate_work_effort_estimate(self.results)
+
+                        if effort_result and 'error' not in effort_result:
+                            self.results['effort_estimate'] = effort_result
+                        else:
+                            error_msg = effort_result.get('error', '未知错误') if effort_result else '返回结果为空'
+                            self.results['effort_estimate'] = {'error': error_msg}
+                    except Exception as e:
+                        logger.error(f"计算工作量估算时发生异常: {e}")
+                        self.results['effort_estimate'] = {'error': f'计算失败: {e}'}
             else:
                 pass
 
@@ -78,8 +144,23 @@ class ReportGenerator:
 
             # 写入文件
             try:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.results, f, ensure_ascii=False, indent=2, default=str)
+                # 先整体序列化再一次写入，避免 json.dump 按片段逐次调用 write
+                report_bytes = _serialize_report(self.results, pretty)
+                # 写入临时文件后再替换目标文件，中途失败不会留下不完整的报告；
+                # 临时文件名唯一，同时生成同一报告的多个进程互不覆盖、互不删除对方的临时文件
+                # 以 0o666 创建，由内核按当前 umask 确定权限，与 open() 新建文件一致
+                temp_file = f"{output_file}.{uuid.uuid4().hex}.tmp"
+                fd = os.open(temp_file, _TEMP_REPORT_FLAGS, 0o666)
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        f.write(report_bytes)
+                    os.replace(temp_file, output_file)
+                except BaseException:
+                    try:
+                        os.unlink(temp_file)
+                    except OSError:
+                        pass
+                    raise
 
                 logger.info(f"报告已生成: {output_file}")
                 return output_file
@@ -94,21 +175,23 @@ class ReportGenerator:
 
     def _calculate_performance_metrics(self) -> Dict[str, Any]:
         """计算性能指标"""
+        stats = self.stats
+        analysis_duration = stats.get('analysis_duration', 0)
         metrics = {
-            'analysis_duration': self.stats.get('analysis_duration', 0),
-            'memory_usage_mb': self.stats.get('memory_usage', 0),
+            'analysis_duration': analysis_duration,
+            'memory_usage_mb': stats.get('memory_usage', 0),
             'files_per_second': 0,
             'error_rate': 0
         }
 
         # 计算文件处理速度
-        total_files = self.stats.get('files_processed', 0) + self.stats.get('files_skipped', 0)
-        if total_files > 0 and metrics['analysis_duration'] > 0:
-            metrics['files_per_second'] = total_files / metrics['analysis_duration']
+        total_files = stats.get('files_processed', 0) + stats.get('files_skipped', 0)
+        if total_files > 0 and analysis_duration > 0:
+            metrics['files_per_second'] = total_files / analysis_duration
 
         # 计算错误率
         if total_files > 0:
-            metrics['error_rate'] = self.stats.get('errors_encountered', 0) / total_files
+            metrics['error_rate'] = stats.get('errors_encountered', 0) / total_files
 
         return metrics
 
@@ -122,107 +205,116 @@ class ReportGenerator:
 
     def _generate_summary(self) -> Dict[str, Any]:
         """生成分析摘要"""
+        stats = self.stats
+        files_processed = stats.get('files_processed', 0)
+        files_skipped = stats.get('files_skipped', 0)
+        # 只在缺少开始时间时才取当前时间
+        start_time = stats.get('start_time')
+        if start_time is None:
+            start_time = datetime.now()
         return {
             'total_modules': len(self.results.get('module_analysis', {})),
-            'total_files': self.stats.get('files_processed', 0) + self.stats.get('files_skipped', 0),
-            'successful_files': self.stats.get('files_processed', 0),
-            'skipped_files': self.stats.get('files_skipped', 0),
-            'error_files': self.stats.get('errors_encountered', 0),
-            'analysis_timestamp': self.stats.get('start_time', datetime.now()).isoformat(),
-            'analysis_duration_seconds': self.stats.get('analysis_duration', 0)
+            'total_files': files_processed + files_skipped,
+            'successful_files': files_processed,
+            'skipped_files': files_skipped,
+            'error_files': stats.get('errors_encountered', 0),
+            'analysis_timestamp': start_time.isoformat(),
+            'analysis_duration_seconds': stats.get('analysis_duration', 0)
         }
 
     def print_summary(self):
-        """打印分析摘要"""
-        print("="*80)
-        print("项目复杂度分析报告")
-        print("="*80)
+        """打印分析摘要（各行汇总后一次输出）"""
+        lines = []
+        lines.append(_SUMMARY_SEPARATOR)
+        lines.append("项目复杂度分析报告")
+        lines.append(_SUMMARY_SEPARATOR)
 
         # 项目信息
         if 'project_info' in self.results:
             project_info = self.results['project_info']
-            print(f"\n项目信息:")
-            print("-" * 50)
+            lines.append("\n项目信息:")
+            lines.append(_SECTION_SEPARATOR)
             if 'name' in project_info:
-                print(f"项目名称: {project_info['name']}")
+                lines.append(f"项目名称: {project_info['name']}")
             if 'path' in project_info:
-                print(f"项目路径: {project_info['path']}")
+                lines.append(f"项目路径: {project_info['path']}")
             if 'type' in project_info:
-                print(f"项目类型: {project_info['type']}")
+                lines.append(f"项目类型: {project_info['type']}")
 
         # 模块分析结果
         if 'module_analysis' in self.results:
             module_analysis = self.results['module_analysis']
-            print(f"\n模块分析结果:")
-            print("-" * 50)
+            lines.append("\n模块分析结果:")
+            lines.append(_SECTION_SEPARATOR)
             for module_name, module_data in module_analysis.items():
                 if 'error' in module_data:
-                    print(f"• {module_name}: 分析失败 - {module_data['error']}")
+                    lines.append(f"• {module_name}: 分析失败 - {module_data['error']}")
                 else:
-                    complexity = module_data.get('complexity', {})
+                    complexity = module_data.get('complexity', _EMPTY_DICT)
                     total_complexity = complexity.get('total_complexity', 0)
                     total_lines = complexity.get('total_lines', 0)
-                    print(f"• {module_name}: 复杂度 {total_complexity}, 代码行数 {total_lines}")
+                    lines.append(f"• {module_name}: 复杂度 {total_complexity}, 代码行数 {total_lines}")
 
         # 工作量估算
         if 'effort_estimate' in self.results and self.results['effort_estimate'] is not None:
             effort_estimate = self.results['effort_estimate']
             if 'error' not in effort_estimate:
-                print(f"\n工作量估算:")
-                print("-" * 50)
+                lines.append("\n工作量估算:")
+                lines.append(_SECTION_SEPARATOR)
                 total_effort = effort_estimate.get('total_effort', 0)
-                print(f"总工作量: {total_effort:.1f} 人天")
+                lines.append(f"总工作量: {total_effort:.1f} 人天")
 
                 if 'new_module_efforts' in effort_estimate:
                     new_module_efforts = effort_estimate['new_module_efforts']
                     if 'error' not in new_module_efforts:
-                        print(f"新模块开发工作量: {new_module_efforts.get('total_effort', 0):.1f} 人天")
+                        lines.append(f"新模块开发工作量: {new_module_efforts.get('total_effort', 0):.1f} 人天")
 
         # 推荐和建议
         if 'recommendations' in self.results:
             recommendations = self.results['recommendations']
             if recommendations:
-                print(f"\n开发建议:")
-                print("-" * 50)
+                lines.append("\n开发建议:")
+                lines.append(_SECTION_SEPARATOR)
                 for i, rec in enumerate(recommendations, 1):
-                    print(f"{i}. {rec}")
+                    lines.append(f"{i}. {rec}")
 
         # 分析统计
         if 'summary' in self.results:
             summary = self.results['summary']
-            print(f"\n分析统计:")
-            print("-" * 50)
-            print(f"总模块数: {summary.get('total_modules', 0)}")
-            print(f"总文件数: {summary.get('total_files', 0)}")
-            print(f"成功分析: {summary.get('successful_files', 0)}")
-            print(f"跳过文件: {summary.get('skipped_files', 0)}")
-            print(f"错误文件: {summary.get('error_files', 0)}")
-            print(f"分析耗时: {summary.get('analysis_duration_seconds', 0):.2f}秒")
+            lines.append("\n分析统计:")
+            lines.append(_SECTION_SEPARATOR)
+            lines.append(f"总模块数: {summary.get('total_modules', 0)}")
+            lines.append(f"总文件数: {summary.get('total_files', 0)}")
+            lines.append(f"成功分析: {summary.get('successful_files', 0)}")
+            lines.append(f"跳过文件: {summary.get('skipped_files', 0)}")
+            lines.append(f"错误文件: {summary.get('error_files', 0)}")
+            lines.append(f"分析耗时: {summary.get('analysis_duration_seconds', 0):.2f}秒")
 
         # 性能指标
         if 'statistics' in self.results and 'performance_metrics' in self.results['statistics']:
             perf_metrics = self.results['statistics']['performance_metrics']
-            print(f"\n性能指标:")
-            print("-" * 50)
-            print(f"分析速度: {perf_metrics.get('files_per_second', 0):.2f} 文件/秒")
+            lines.append("\n性能指标:")
+            lines.append(_SECTION_SEPARATOR)
+            lines.append(f"分析速度: {perf_metrics.get('files_per_second', 0):.2f} 文件/秒")
             if perf_metrics.get('memory_usage_mb', 0) > 0:
-                print(f"内存使用: {perf_metrics.get('memory_usage_mb', 0):.2f} MB")
-            print(f"错误率: {perf_metrics.get('error_rate', 0):.2%}")
+                lines.append(f"内存使用: {perf_metrics.get('memory_usage_mb', 0):.2f} MB")
+            lines.append(f"错误率: {perf_metrics.get('error_rate', 0):.2%}")
 
         # 配置信息
         if 'statistics' in self.results and 'configuration' in self.results['statistics']:
             config = self.results['statistics']['configuration']
-            print(f"\n分析配置:")
-            print("-" * 50)
-            print(f"并行处理: {'启用' if config.get('parallel_processing', {}).get('enabled', True) else '禁用'}")
+            lines.append("\n分析配置:")
+            lines.append(_SECTION_SEPARATOR)
+            lines.append(f"并行处理: {'启用' if config.get('parallel_processing', {}).get('enabled', True) else '禁用'}")
 
-            print(f"最大文件大小: {config.get('max_file_size_mb', 0):.1f} MB")
+            lines.append(f"最大文件大小: {config.get('max_file_size_mb', 0):.1f} MB")
 
-        print("="*80)
+        lines.append(_SUMMARY_SEPARATOR)
+        print("\n".join(lines))
 
 
 def generate_report(results: Dict[str, Any], stats: Dict[str, Any], config: Any,
-                   output_file: Optional[str] = None) -> str:
+                   output_file: Optional[str] = None, pretty: bool = False) -> str:
     """
     生成报告的便捷函数
 
@@ -231,12 +323,13 @@ def generate_report(results: Dict[str, Any], stats: Dict[str, Any], config: Any,
         stats: 统计信息
         config: 配置对象
         output_file: 输出文件路径
+        pretty: 是否输出缩进格式的JSON
 
     Returns:
         输出文件路径
     """
     generator = ReportGenerator(results, stats, config)
-    return generator.generate_report(output_file)
+    return generator.generate_report(output_file, pretty)
 
 
 def print_summary(results: Dict[str, Any], stats: Dict[str, Any], config: Any):
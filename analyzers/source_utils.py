@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+源码扫描工具模块
+语言分析器共用的源码读取、切行、行分类与行号定位函数
+"""
+
+import mmap
+import os
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, List, Tuple, Iterator, Pattern, Match, Optional, Union
+
+# NumPy为可选依赖，安装后行分类使用向量化字节扫描
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# 行分类代码（行分类表下标为行号，下标0不使用）
+LINE_CODE = 0
+LINE_BLANK = 1
+LINE_COMMENT = 2
+LINE_STRING = 3  # 多行字符串内部的行：计入代码行，但不参与结构匹配
+
+_NEWLINE_PATTERN = re.compile('\n')
+
+# C风格语言的花括号扫描：注释与字符串字面量整体匹配后跳过（单/双引号字符串除反斜杠续行外不跨行，
+# 模板字符串可跨行），其余位置的每个花括号单独匹配。
+# 各分支均以单个字面量字符开头且不含命名分组，正则引擎可按首字符集合快速定位；匹配类型由首字符区分
+BRACE_TOKEN_PATTERN = re.compile(r'''
+      //[^\n]*
+    | /\*[^*]*(?:\*+[^*/][^*]*)*(?:\*+/|\**\Z)
+    | '[^'\\\n]*(?:\\.[^'\\\n]*)*'?
+    | "[^"\\\n]*(?:\\.[^"\\\n]*)*"?
+    | `[^`\\]*(?:\\.[^`\\]*)*`?
+    | [{}]
+''', re.VERBOSE | re.DOTALL)
+
+# 使用内存映射读取的最小文件字节数，大文件直接从页缓存解码，省去一次完整的字节拷贝
+MMAP_MIN_BYTES = 1024 * 1024
+
+# 向量化行分类的最小文件字节数，小文件上NumPy的固定开销超过逐行扫描
+VECTORIZE_MIN_BYTES = 64 * 1024
+
+
+def read_source_bytes(file_path: Path) -> Union[bytes, mmap.mmap]:
+    """
+    读取源码文件的原始字节
+
+    不小于 MMAP_MIN_BYTES 的文件返回只读内存映射（支持缓冲区协议，可直接解码、
+    交给NumPy），映射在对象回收时释放；映射失败或小文件时读取为bytes
+    """
+    with open(file_path, 'rb') as f:
+        try:
+            if os.fstat(f.fileno()).st_size >= MMAP_MIN_BYTES:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            pass
+        return f.read()
+
+
+def decode_source(raw: Union[bytes, mmap.mmap]) -> str:
+    """解码源码（忽略解码错误），换行处理与文本模式的通用换行一致"""
+    source = str(raw, 'utf-8', 'ignore')
+    if '\r' in source:
+        source = source.replace('\r\n', '\n').replace('\r', '\n')
+    return source
+
+
+def read_source(file_path: Path) -> str:
+    """一次性读取整个源码文件（通用换行模式，忽略解码错误）"""
+    return decode_source(read_source_bytes(file_path))
+
+
+def split_lines(source: str) -> List[str]:
+    """按换行符切分源码，行数与 readlines() 保持一致"""
+    lines = source.split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    return lines
+
+
+def newline_offsets(source: str) -> List[int]:
+    """获取源码中所有换行符的偏移量（升序），用于二分查找行号"""
+    return [match.start() for match in _NEWLINE_PATTERN.finditer(source)]
+
+
+def line_number_at(offsets: List[int], position: int) -> int:
+    """根据换行偏移表计算字符位置所在的行号（从1开始）"""
+    return bisect_left(offsets, position) + 1
+
+
+def iter_first_match_lines(pattern: Pattern, source: str, offsets: List[int]) -> Iterator[Tuple[int, Match]]:
+    """整文件扫描，返回每行的首个匹配（等价于逐行search），命中后直接跳到下一行继续"""
+    position = 0
+    while True:
+        match = pattern.search(source, position)
+        if match is None:
+            return
+        line_num = line_number_at(offsets, match.start())
+        yield line_num, match
+        if line_num > len(offsets):
+            return
+        position = offsets[line_num - 1] + 1
+
+
+def classify_lines(lines: List[str], comment_prefixes: Tuple[str, ...],
+                   raw: Optional[Union[bytes, mmap.mmap]] = None) -> bytearray:
+    """
+    生成行分类表：空行、以注释前缀开头的行、其余为代码行
+
+    Args:
+        lines: split_lines() 切分出的源码行
+        comment_prefixes: 单行注释前缀（ASCII）
+        raw: 源码原始字节，NumPy可用且文件不小于 VECTORIZE_MIN_BYTES 时使用向量化扫描
+
+    Returns:
+        行分类表，下标为行号，值为 LINE_CODE / LINE_BLANK / LINE_COMMENT
+    """
+    if NUMPY_AVAILABLE and raw and len(raw) >= VECTORIZE_MIN_BYTES:
+        line_kinds = _classify_lines_vectorized(lines, comment_prefixes, raw)
+        if line_kinds is not None:
+            return line_kinds
+
+    line_kinds = bytearray(len(lines) + 1)
+    for line_num, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            line_kinds[line_num] = LINE_BLANK
+        elif line.startswith(comment_prefixes):
+            line_kinds[line_num] = LINE_COMMENT
+    return line_kinds
+
+
+def _classify_lines_vectorized(lines: List[str], comment_prefixes: Tuple[str, ...],
+                               raw: Union[bytes, mmap.mmap]) -> Optional[bytearray]:
+    """基于NumPy字节数组的行分类，无法与文本逐行结果保持一致时返回None由调用方回退"""
+    buf = np.frombuffer(raw, dtype=np.uint8)
+
+    # 含非空白控制字符（0x00-0x08、0x0E-0x1B）时 <=0x20 不等价于空白判断
+    if (buf < 9).any() or ((buf - 14) < 14).any():
+        return None
+
+    newlines = np.flatnonzero(buf == 10)
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(buf)]))
+    if buf[-1] == 10:
+        starts, ends = starts[:-1], ends[:-1]
+
+    # 存在单独的\r换行时字节行与文本行不对应
+    if len(starts) != len(lines):
+        return None
+
+    # 行首个非空白字节必然紧跟在空白之后（或位于文件开头），只需在这些位置中二分查找
+    space = buf <= 32
+    word_starts = ~space
+    word_starts[1:] &= space[:-1]
+    word_starts = np.append(np.flatnonzero(word_starts), len(buf))
+    first = word_starts[np.searchsorted(word_starts, starts)]
+    blank = first >= ends
+
+    last_index = len(buf) - 1
+    comment = np.zeros(len(starts), dtype=bool)
+    for prefix in comment_prefixes:
+        matched = ~blank
+        for i, byte in enumerate(prefix.encode('ascii')):
+            matched &= (first + i <= last_index) & (buf[np.minimum(first + i, last_index)] == byte)
+        comment |= matched
+
+    kinds = np.where(blank, LINE_BLANK, np.where(comment, LINE_COMMENT, LINE_CODE)).astype(np.uint8)
+    line_kinds = bytearray(1) + bytearray(kinds.tobytes())
+
+    # 首字符为非ASCII的行（Unicode空白、无法解码的字节）按文本逐行复核
+    non_ascii = ~blank & (buf[np.minimum(first, last_index)] >= 0x80)
+    for index in np.flatnonzero(non_ascii).tolist():
+        line = lines[index].strip()
+        if not line:
+            line_kinds[index + 1] = LINE_BLANK
+        elif line.startswith(comment_prefixes):
+            line_kinds[index + 1] = LINE_COMMENT
+        else:
+            line_kinds[index + 1] = LINE_CODE
+    return line_kinds
+
+
+def mark_line_range(line_kinds: bytearray, start: int, end: int, kind: int = LINE_COMMENT):
+    """将 [start, end) 行号范围内的非空行标记为指定类型（空行保持不变）"""
+    if start < end:
+        table = bytearray([kind]) * 256
+        table[LINE_BLANK] = LINE_BLANK
+        line_kinds[start:end] = line_kinds[start:end].translate(table)
+
+
+def mark_block_comment_lines(line_kinds: bytearray, source: str):
+    """
+    标记C风格块注释所在及跨越的行为注释行（含/*不含*/的行开启块注释，含*/的行结束块注释）
+
+    用 str.find 在注释边界之间跳转，行号由换行符计数累加得到，不逐行检查
+    """
+    next_open = source.find('/*')
+    next_close = source.find('*/')
+    position = 0  # 下一个待检查行的行首偏移
+    line_num = 1  # position 所在的行号
+    in_multiline_comment = False
+    previous_line = 0
+    while True:
+        # 已越过的边界位置需要从当前行首重新查找
+        if 0 <= next_open < position:
+            next_open = source.find('/*', position)
+        if 0 <= next_close < position:
+            next_close = source.find('*/', position)
+        if next_open < 0 and next_close < 0:
+            break
+
+        marker = next_open if next_close < 0 or 0 <= next_open < next_close else next_close
+        line_num += source.count('\n', position, marker)
+        line_end = source.find('\n', marker)
+        if line_end < 0:
+            line_end = len(source)
+
+        if in_multiline_comment:
+            mark_line_range(line_kinds, previous_line + 1, line_num)
+        line_kinds[line_num] = LINE_COMMENT
+        in_multiline_comment = not 0 <= next_close < line_end
+        previous_line = line_num
+
+        position = line_end + 1
+        line_num += 1
+
+    if in_multiline_comment:
+        mark_line_range(line_kinds, previous_line + 1, len(line_kinds))
+
+
+def find_block_end(source: str, open_position: int) -> int:
+    """
+    从左花括号位置开始配对花括号，返回与之匹配的右花括号位置（未闭合时返回源码长度）
+
+    注释与字符串字面量中的花括号不参与配对
+    """
+    depth = 0
+    for match in BRACE_TOKEN_PATTERN.finditer(source, open_position):
+        char = source[match.start()]
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return match.start()
+    return len(source)
+
+
+def iter_dir_entries(root: str, prune: Optional[Callable[[os.DirEntry], bool]] = None) -> Iterator[os.DirEntry]:
+    """
+    递归遍历目录，按 Path.rglob('*') 的顺序产出全部目录项（含子目录本身）
+
+    基于 os.scandir，目录项自带文件类型，调用方可直接使用其缓存的类型与 stat()。
+    与 rglob 一致，不进入符号链接目录，无权限读取的目录直接跳过；
+    prune 对子目录返回真值时不进入该目录（目录项本身仍会产出）
+    """
+    directories = [root]
+    while directories:
+        subdirectories = []
+        try:
+            with os.scandir(directories.pop()) as entries:
+                for entry in entries:
+                    yield entry
+                    try:
+                        if not entry.is_dir(follow_symlinks=False):
+                            continue
+                    except OSError:
+                        continue
+                    if prune is None or not prune(entry):
+                        subdirectories.append(entry.path)
+        except OSError:
+            continue
+        # 子目录逆序入栈，出栈时按目录项顺序深度优先遍历
+        directories.extend(reversed(subdirectories))
+
+
+def stat_keyed_cache(analyze_func: Callable[..., Any], maxsize: int = 1024) -> Callable[..., Any]:
+    """
+    为文件分析函数 analyze_func(file_path, *args) 创建带缓存的查找函数
+
+    缓存按 (路径, 修改时间, 文件大小, 附加参数) 区分，文件修改后自动失效；返回的是缓存中的共享对象，
+    调用方只读。无法获取文件状态时直接分析，不写入缓存。查找函数带有 cache_clear / cache_info
+    """
+    @lru_cache(maxsize=maxsize)
+    def cached(path_str: str, mtime_ns: int, size: int, args: Tuple[Any, ...]) -> Any:
+        return analyze_func(Path(path_str), *args)
+
+    def lookup(file_path: Path, *args: Any) -> Any:
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            return analyze_func(file_path, *args)
+        return cached(os.fspath(file_path), file_stat.st_mtime_ns, file_stat.st_size, args)
+
+    lookup.cache_clear = cached.cache_clear
+    lookup.cache_info = cached.cache_info
+    return lookup
@@ -30,6 +30,7 @@ def create_argument_parser() -> argparse.ArgumentParser:
   python proj_comp_analyzer.py /path/to/project -o report.json     # 指定输出文件
   python proj_comp_analyzer.py /path/to/project -v                 # 详细输出
   python proj_comp_analyzer.py /path/to/project --no-parallel      # 禁用并行处理
+  python proj_comp_analyzer.py /path/to/project --pretty           # 输出缩进格式的JSON报告
 
         """
     )
@@ -63,6 +64,12 @@ def create_argument_parser() -> argparse.ArgumentParser:
         help='禁用并行处理'
     )
 
+    parser.add_argument(
+        '--pretty',
+        action='store_true',
+        help='输出缩进格式的JSON报告（默认输出紧凑格式）'
+    )
+
 
 
     parser.add_argument(
@@ -238,9 +245,9 @@ def main():
         # 生成报告
         output_file = args.output
         if output_file:
-            analyzer.generate_report(output_file)
+            analyzer.generate_report(output_file, pretty=args.pretty)
         else:
-            analyzer.generate_report()
+            analyzer.generate_report(pretty=args.pretty)
 
         print("\n分析完成！")
         return 0